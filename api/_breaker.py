@@ -0,0 +1,139 @@
+import threading
+import time
+from pymongo.errors import ConnectionFailure
+from api._db import env_int
+from api._logging import get_logger
+from api._metrics import register_collector
+
+log = get_logger("breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionFailure):
+    """Raised instead of calling through while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fail fast once a dependency keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    call() raises CircuitOpenError without touching the dependency. Once
+    ``reset_timeout`` seconds have passed a single trial call is let
+    through: success closes the circuit, failure opens it again. Only
+    exceptions in ``failure_types`` count as failures; anything else means
+    the dependency answered, so it counts as a success.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, failure_types=(ConnectionFailure,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.trips = 0
+
+        self._trial_in_flight = False
+        self._close_callbacks = []
+        self._lock = threading.Lock()
+
+    def on_close(self, callback):
+        """Run ``callback()`` every time the circuit closes after being open"""
+        self._close_callbacks.append(callback)
+
+    def allow(self):
+        """Whether a call may go through now; claims the trial slot when half open"""
+        if self.state == CLOSED:
+            return True
+
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        if self.state == CLOSED and not self.consecutive_failures:
+            return
+
+        with self._lock:
+            reopened = self.state != CLOSED
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+        if reopened:
+            log.info("circuit_closed", breaker=self.name)
+            for callback in self._close_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    log.error("circuit_close_callback_failed", breaker=self.name, error=str(e))
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                tripped = self.state != OPEN
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+                if tripped:
+                    self.trips += 1
+            else:
+                tripped = False
+
+        if tripped:
+            log.warning("circuit_opened", breaker=self.name, failures=self.consecutive_failures)
+
+    def call(self, function, *args, **kwargs):
+        """Call ``function`` through the breaker"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        try:
+            result = function(*args, **kwargs)
+        except self.failure_types:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_success()
+            raise
+
+        self.record_success()
+        return result
+
+
+mongo_breaker = CircuitBreaker(
+    "mongodb",
+    failure_threshold=env_int("MONGODB_BREAKER_THRESHOLD", 5),
+    reset_timeout=env_int("MONGODB_BREAKER_RESET_MS", 30000) / 1000.0
+)
+
+
+def breaker_metrics():
+    lines = ["# TYPE circuit_breaker_state gauge"]
+    for state in (CLOSED, OPEN, HALF_OPEN):
+        value = 1 if mongo_breaker.state == state else 0
+        lines.append(f'circuit_breaker_state{{breaker="{mongo_breaker.name}",state="{state}"}} {value}')
+    lines.append("# TYPE circuit_breaker_rejected_total counter")
+    lines.append(f'circuit_breaker_rejected_total{{breaker="{mongo_breaker.name}"}} {mongo_breaker.rejected}')
+    lines.append("# TYPE circuit_breaker_trips_total counter")
+    lines.append(f'circuit_breaker_trips_total{{breaker="{mongo_breaker.name}"}} {mongo_breaker.trips}')
+    return lines
+
+
+register_collector(breaker_metrics)
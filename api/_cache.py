@@ -0,0 +1,70 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+# ``encoded`` memoizes the body's compressed variants, keyed by content coding
+CachedResponse = namedtuple("CachedResponse", ["body", "etag", "expires_at", "encoded"])
+
+# Named caches shared by every handler loaded into this process
+_caches = {}
+_registry_lock = threading.Lock()
+
+
+def make_etag(body):
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """Evaluate an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or ("W/" + etag) in candidates
+
+
+class ResponseCache:
+    """TTL cache of pre-serialized response bodies and their ETags"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the fresh entry for ``key``, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, key, body):
+        entry = CachedResponse(body, make_etag(body), time.monotonic() + self.ttl, {})
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_cache(name, ttl):
+    with _registry_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = ResponseCache(ttl)
+        return cache
+
+
+def invalidate(name):
+    """Drop a named cache's entries; a no-op if the cache was never created"""
+    cache = _caches.get(name)
+    if cache is not None:
+        cache.invalidate()
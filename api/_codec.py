@@ -0,0 +1,54 @@
+import json
+import os
+
+# orjson is optional: it parses and serializes several times faster than the
+# stdlib, and everything here falls back to json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if os.getenv("JSON_CODEC", "").lower() == "json":
+    orjson = None
+
+CODEC = "orjson" if orjson is not None else "json"
+
+# orjson.JSONDecodeError subclasses this, so one except clause covers both codecs
+JSONDecodeError = json.JSONDecodeError
+
+# json.dumps() builds a new encoder whenever it is given options; build them once instead
+_compact = json.JSONEncoder(separators=(",", ":"))
+_pretty = json.JSONEncoder(indent=2)
+_decoder = json.JSONDecoder()
+
+
+def _json_loads(data):
+    # Request bodies are UTF-8; decoding directly skips json.loads()'s encoding detection
+    if isinstance(data, (bytes, bytearray)):
+        try:
+            data = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise JSONDecodeError(f"Invalid UTF-8: {e.reason}", "", e.start)
+    return _decoder.decode(data)
+
+
+def _json_dumps(obj, default=None, pretty=False):
+    if default is not None:
+        return json.dumps(obj, default=default, indent=2 if pretty else None,
+                          separators=None if pretty else (",", ":")).encode("utf-8")
+    return (_pretty if pretty else _compact).encode(obj).encode("utf-8")
+
+
+def _orjson_dumps(obj, default=None, pretty=False):
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+    return orjson.dumps(obj, default=default, option=option)
+
+
+# loads(bytes or str) parses a document; dumps(obj, default=None, pretty=False)
+# returns compact UTF-8 bytes, indented by two spaces when ``pretty``
+if orjson is not None:
+    loads = orjson.loads
+    dumps = _orjson_dumps
+else:
+    loads = _json_loads
+    dumps = _json_dumps
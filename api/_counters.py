@@ -0,0 +1,67 @@
+from datetime import datetime
+from api._logging import get_logger
+
+log = get_logger("counters")
+
+# Materialized totals live in a single document so /api/stats reads them
+# with one point lookup instead of counting every collection.
+COUNTERS_COLLECTION = "counters"
+TOTALS_ID = "totals"
+COUNTED_COLLECTIONS = ("waitlist_entries", "feedback_responses", "newsletter_subscribers")
+
+
+def increment_counter(db, collection_name, amount=1):
+    """Atomically add ``amount`` to a collection's total. Never raises."""
+    increment_counters(db, {collection_name: amount})
+
+
+def increment_counters(db, amounts):
+    """Add {collection name: amount} to the totals in a single update. Never raises.
+
+    A missing totals document is left missing: starting it from zero would
+    hide every document written before it, so read_counters() reports None
+    and the next reader rebuilds it from exact counts instead.
+    """
+    amounts = {name: amount for name, amount in amounts.items() if amount > 0}
+    if not amounts:
+        return
+    try:
+        db[COUNTERS_COLLECTION].update_one(
+            {"_id": TOTALS_ID},
+            {"$inc": amounts, "$set": {"updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        log.error("counter_increment_failed", collections=sorted(amounts), error=str(e))
+
+
+def read_counters(db):
+    """Return the materialized totals, or None if they were never built"""
+    doc = db[COUNTERS_COLLECTION].find_one({"_id": TOTALS_ID})
+    if doc is None:
+        return None
+    return {name: int(doc.get(name, 0)) for name in COUNTED_COLLECTIONS}
+
+
+def estimated_counts(db):
+    """Totals from collection metadata; fast but approximate after unclean shutdowns"""
+    return {name: db[name].estimated_document_count() for name in COUNTED_COLLECTIONS}
+
+
+def reconcile_counters(db):
+    """Rebuild the totals from exact counts of every collection"""
+    totals = {name: db[name].count_documents({}) for name in COUNTED_COLLECTIONS}
+    db[COUNTERS_COLLECTION].update_one(
+        {"_id": TOTALS_ID},
+        {"$set": dict(totals, updated_at=datetime.utcnow(), reconciled_at=datetime.utcnow())},
+        upsert=True
+    )
+    return totals
+
+
+if __name__ == "__main__":
+    from api._db import get_database
+
+    database = get_database()
+    if database is None:
+        raise SystemExit("Database connection failed")
+    print(f"Reconciled counters: {reconcile_counters(database)}")
@@ -0,0 +1,163 @@
+import math
+import os
+import threading
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
+from api._indexes import ensure_indexes
+from api._logging import get_logger
+
+log = get_logger("db")
+
+# Shared connection cache, reused across invocations of a warm instance
+_client = None
+_db = None
+_lock = threading.Lock()
+_bootstrapped = False
+
+DATABASE_NAME = "thetruthschool"
+
+# Standalone servers cannot run multi-document transactions; Atlas clusters are replica sets
+TRANSACTION_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        log.warning("invalid_setting", name=name, value=value, default=default)
+        return default
+
+
+def env_float(name, default):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number):
+        log.warning("invalid_setting", name=name, value=value, default=default)
+        return default
+    return number
+
+
+def get_client():
+    """Return the shared MongoClient, building it on first use.
+
+    Construction never blocks on the network: pymongo discovers the
+    topology and opens ``minPoolSize`` connections on background threads,
+    so the first operation finds a warm pool instead of paying for a ping
+    and a list_collection_names() round trip up front.
+    """
+    global _client
+
+    if _client is not None:
+        return _client
+
+    with _lock:
+        if _client is not None:
+            return _client
+
+        mongodb_uri = os.getenv("MONGODB_URI")
+        if not mongodb_uri:
+            log.error("mongodb_uri_missing")
+            return None
+
+        listeners = []
+        if os.getenv("MONGODB_MONITORING", "1").lower() not in ("0", "false", "no"):
+            # Imported here because the monitoring module itself reads settings from this one
+            from api._mongo_monitoring import event_listeners
+            listeners = event_listeners()
+
+        try:
+            _client = MongoClient(
+                mongodb_uri,
+                event_listeners=listeners,
+                maxPoolSize=env_int("MONGODB_MAX_POOL_SIZE", 10),
+                minPoolSize=env_int("MONGODB_MIN_POOL_SIZE", 1),
+                maxIdleTimeMS=env_int("MONGODB_MAX_IDLE_TIME_MS", 60000),
+                serverSelectionTimeoutMS=env_int("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 5000),
+                connectTimeoutMS=env_int("MONGODB_CONNECT_TIMEOUT_MS", 5000),
+                retryWrites=True,
+            )
+        except Exception as e:
+            log.error("mongodb_client_failed", error=str(e))
+            _client = None
+
+        return _client
+
+
+def get_database():
+    """Return the shared database handle, or None if it cannot be configured"""
+    global _db
+
+    if _db is not None:
+        return _db
+
+    client = get_client()
+    if client is None:
+        return None
+
+    # ALWAYS use explicit database name - never rely on get_default_database()
+    _db = client[DATABASE_NAME]
+    _bootstrap(_db)
+    return _db
+
+
+def _bootstrap(db):
+    """Create indexes once per process without blocking the request path"""
+    global _bootstrapped
+
+    if _bootstrapped or os.getenv("MONGODB_SKIP_INDEX_BOOTSTRAP"):
+        return
+    _bootstrapped = True
+
+    threading.Thread(target=ensure_indexes, args=(db,), daemon=True).start()
+
+
+def insert_if_absent(collection, email, fields, session=None):
+    """Insert a document keyed on email unless one exists, in one round trip.
+
+    Relies on the unique email index: two concurrent upserts for the same
+    address can race, and the loser surfaces as a DuplicateKeyError.
+    Returns True when a new document was inserted.
+    """
+    try:
+        result = collection.update_one(
+            {"email": email},
+            {"$setOnInsert": fields},
+            upsert=True,
+            session=session
+        )
+    except DuplicateKeyError:
+        return False
+
+    return result.upserted_id is not None
+
+
+def supports_transactions(client):
+    """Whether the deployment pymongo has discovered can run multi-document transactions.
+
+    Reads the client's current topology description, so it costs no round
+    trip; it stays False until discovery has found a replica set primary
+    or a mongos.
+    """
+    try:
+        topology_type = client.topology_description.topology_type_name
+    except AttributeError:
+        return False
+    return topology_type in TRANSACTION_TOPOLOGIES
+
+
+def use_client(client):
+    """Install a pre-built client, e.g. an in-memory stand-in for local runs"""
+    global _client, _db, _bootstrapped
+
+    with _lock:
+        _client = client
+        _db = None
+        _bootstrapped = False
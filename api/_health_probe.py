@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import pymongo
+from api._breaker import OPEN, mongo_breaker
+from api._db import env_int, get_database
+from api._logging import get_logger
+from api._metrics import register_collector
+from api._mongo_monitoring import commands, pool
+
+log = get_logger("health_probe")
+
+# One ping per interval on a background thread; health checks only read the result
+PROBE_INTERVAL = env_int("HEALTH_PROBE_INTERVAL_MS", 5000) / 1000.0
+# Probes the recent error rates are computed over
+PROBE_WINDOW = env_int("HEALTH_PROBE_WINDOW", 12)
+# Readiness fails when more than this share of recent MongoDB commands failed
+MAX_ERROR_RATE = env_int("HEALTH_MAX_ERROR_PERCENT", 50) / 100.0
+# Upper bound on one probe, from server selection to reply; pymongo sets no socket timeout by default
+PROBE_TIMEOUT = env_int("HEALTH_PROBE_TIMEOUT_MS", 2000) / 1000.0
+# A result this old means the prober was frozen (serverless) or is stuck; either way it proves nothing
+STALE_AFTER = 3 * PROBE_INTERVAL
+
+
+def command_totals():
+    """(commands, failed commands) seen by the driver's command listener so far"""
+    total = sum(histogram.count for histogram in list(commands.histograms.values()))
+    return total, sum(list(commands.failures.values()))
+
+
+class DatabaseProbe:
+    """Ping MongoDB at a fixed interval and keep the outcome for health checks.
+
+    report() never touches the network: it reads the state the last
+    probe left behind, so a readiness check costs microseconds however
+    slow or dead the database is.
+    """
+
+    def __init__(self, interval, window):
+        self.interval = interval
+        self.outcomes = deque(maxlen=window)
+        self.command_samples = deque(maxlen=window + 1)
+        self.probes = 0
+        self.failures = 0
+        # Replaced wholesale after each probe, so readers never see a partial update
+        self.state = None
+
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="health-probe", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.probe()
+            except Exception as e:
+                log.error("database_probe_crashed", error=str(e))
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def probe(self):
+        """Ping once, timing the whole path a request takes: server selection, checkout and round trip"""
+        error = None
+        started = time.perf_counter()
+        try:
+            db = get_database()
+            if db is None:
+                error = "Database connection failed"
+            else:
+                # Bounds the whole operation, socket reads included, so a hung connection fails the probe
+                with pymongo.timeout(PROBE_TIMEOUT):
+                    db.command("ping")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:200]
+        rtt_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        self.probes += 1
+        if error is not None:
+            self.failures += 1
+        self.outcomes.append(error is None)
+        self.command_samples.append(command_totals())
+
+        (first_total, first_failed), (last_total, last_failed) = self.command_samples[0], self.command_samples[-1]
+        executed = last_total - first_total
+
+        previous = self.state
+        self.state = {
+            "reachable": error is None,
+            "rtt_ms": rtt_ms,
+            "error": error,
+            "probe_error_rate": round(self.outcomes.count(False) / len(self.outcomes), 3),
+            "command_error_rate": round((last_failed - first_failed) / executed, 3) if executed else 0.0,
+            "checked_at": datetime.utcnow().isoformat(),
+            "checked": time.monotonic()
+        }
+
+        if previous is None or previous["reachable"] != self.state["reachable"]:
+            if error is None:
+                log.info("database_reachable", rtt_ms=rtt_ms)
+            else:
+                log.warning("database_unreachable", rtt_ms=rtt_ms, error=error)
+
+    def report(self):
+        """Readiness from the cached probe state: (ready, JSON-friendly details)"""
+        state = self.state
+        if state is None:
+            self.start()
+            return False, {"status": "starting", "probes": self.probes}
+
+        age = time.monotonic() - state["checked"]
+        stale = age > STALE_AFTER
+        if stale:
+            # Woken from a freeze; probe now so the next check sees fresh data
+            self._wake.set()
+
+        details = {key: value for key, value in state.items() if key != "checked"}
+        details["age_ms"] = round(age * 1000)
+        details["stale"] = stale
+        details["breaker"] = mongo_breaker.state
+        details["pool"] = {
+            "max_size": pool.max_pool_size,
+            "open": pool.open_connections,
+            "checked_out": pool.checked_out,
+            "waiting": pool.waiting,
+            "saturation": round(pool.saturation(), 3)
+        }
+
+        ready = (
+            state["reachable"]
+            and not stale
+            and mongo_breaker.state != OPEN
+            and state["command_error_rate"] <= MAX_ERROR_RATE
+        )
+        details["status"] = "ready" if ready else "unavailable"
+        return ready, details
+
+
+database_probe = DatabaseProbe(PROBE_INTERVAL, PROBE_WINDOW)
+
+
+def probe_metrics():
+    state = database_probe.state
+    lines = ["# TYPE mongodb_probe_total counter"]
+    lines.append(f'mongodb_probe_total{{result="ok"}} {database_probe.probes - database_probe.failures}')
+    lines.append(f'mongodb_probe_total{{result="failed"}} {database_probe.failures}')
+    if state is not None:
+        lines.append("# TYPE mongodb_probe_up gauge")
+        lines.append(f"mongodb_probe_up {1 if state['reachable'] else 0}")
+        lines.append("# TYPE mongodb_probe_rtt_seconds gauge")
+        lines.append(f"mongodb_probe_rtt_seconds {state['rtt_ms'] / 1000}")
+    return lines
+
+
+register_collector(probe_metrics)
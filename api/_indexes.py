@@ -0,0 +1,55 @@
+from pymongo import ASCENDING, DESCENDING
+from api._logging import get_logger
+
+log = get_logger("indexes")
+
+# Declared indexes, keyed by collection name. create_index is idempotent, so
+# running this against an already migrated database only costs a round trip.
+INDEXES = {
+    "waitlist_entries": [
+        {"keys": [("email", ASCENDING)], "name": "email_unique", "unique": True},
+        {"keys": [("created_at", DESCENDING), ("_id", DESCENDING)], "name": "created_at_desc"},
+    ],
+    "feedback_responses": [
+        {"keys": [("email", ASCENDING)], "name": "email"},
+        {"keys": [("created_at", DESCENDING), ("_id", DESCENDING)], "name": "created_at_desc"},
+    ],
+    "newsletter_subscribers": [
+        {"keys": [("email", ASCENDING)], "name": "email_unique", "unique": True},
+        {"keys": [("subscribed_at", DESCENDING), ("_id", DESCENDING)], "name": "subscribed_at_desc"},
+        # Segment counts and send lists only ever target active subscribers
+        {"keys": [("preference_mask", ASCENDING), ("_id", ASCENDING)], "name": "active_preference_mask",
+         "partialFilterExpression": {"status": "active"}},
+    ],
+}
+
+
+def ensure_indexes(db, collections=None):
+    """Create the declared indexes, of every collection or only ``collections``, returning the names that failed"""
+    failed = []
+
+    for collection_name in INDEXES if collections is None else collections:
+        for spec in INDEXES[collection_name]:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                db[collection_name].create_index(spec["keys"], **options)
+            except Exception as e:
+                log.error("index_create_failed", collection=collection_name, index=spec["name"], error=str(e))
+                failed.append(f"{collection_name}.{spec['name']}")
+
+    return failed
+
+
+if __name__ == "__main__":
+    import os
+    from api._db import get_database
+
+    # Run the migration in the foreground instead of the background bootstrap
+    os.environ["MONGODB_SKIP_INDEX_BOOTSTRAP"] = "1"
+    database = get_database()
+    if database is None:
+        raise SystemExit("Database connection failed")
+    failures = ensure_indexes(database)
+    if failures:
+        raise SystemExit(f"Failed to create indexes: {', '.join(failures)}")
+    print("All indexes are in place")
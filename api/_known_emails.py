@@ -0,0 +1,125 @@
+import sys
+import threading
+from collections import OrderedDict
+from pymongo import DESCENDING
+from api._db import env_int, get_database
+from api._logging import get_logger
+from api._metrics import register_collector
+
+log = get_logger("known_emails")
+
+# Hard cap on the memory each collection's set may use
+MAX_BYTES = env_int("KNOWN_EMAILS_MAX_BYTES", 8 * 1024 * 1024)
+# How many of the most recent addresses to preload on cold start; 0 disables it
+WARM_LIMIT = env_int("KNOWN_EMAILS_WARM_LIMIT", 5000)
+# Approximate cost of one OrderedDict slot and link on top of the string itself
+ENTRY_OVERHEAD = 104
+
+_sets = {}
+_registry_lock = threading.Lock()
+
+
+class KnownEmails:
+    """Bounded LRU set of addresses known to be stored in one collection.
+
+    Only addresses the database has confirmed are added, so a hit is
+    certain and the caller can answer "already registered" without a
+    round trip. A miss says nothing; the caller writes as usual. Once the
+    estimated size passes ``max_bytes`` the least recently seen addresses
+    are evicted.
+    """
+
+    def __init__(self, collection_name, max_bytes):
+        self.collection_name = collection_name
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def contains(self, email):
+        with self._lock:
+            if email in self._entries:
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, email, recent=True):
+        """Remember ``email``; warm-up entries go in as the least recently seen"""
+        with self._lock:
+            if email in self._entries:
+                if recent:
+                    self._entries.move_to_end(email)
+                return True
+
+            cost = sys.getsizeof(email) + ENTRY_OVERHEAD
+            if not recent and self.bytes + cost > self.max_bytes:
+                return False
+            self._entries[email] = cost
+            self.bytes += cost
+            if not recent:
+                self._entries.move_to_end(email, last=False)
+
+            while self.bytes > self.max_bytes and self._entries:
+                _, evicted_cost = self._entries.popitem(last=False)
+                self.bytes -= evicted_cost
+                self.evictions += 1
+            return True
+
+    def warm(self, db, sort_field, limit):
+        """Preload the most recent addresses with a projection-only scan"""
+        loaded = 0
+        try:
+            cursor = db[self.collection_name].find(
+                {}, projection={"email": 1, "_id": 0}
+            ).sort(sort_field, DESCENDING).limit(limit)
+            for document in cursor:
+                email = document.get("email")
+                if email and not self.add(email, recent=False):
+                    break
+                loaded += 1
+        except Exception as e:
+            log.warning("known_emails_warm_failed", collection=self.collection_name, error=str(e))
+        log.info("known_emails_warmed", collection=self.collection_name, loaded=loaded)
+        return loaded
+
+
+def get_known_emails(collection_name, sort_field=None):
+    """The shared set for a collection, warmed in the background when first created"""
+    with _registry_lock:
+        known = _sets.get(collection_name)
+        if known is not None:
+            return known
+        known = _sets[collection_name] = KnownEmails(collection_name, MAX_BYTES)
+
+    db = get_database()
+    if sort_field and WARM_LIMIT > 0 and db is not None:
+        threading.Thread(target=known.warm, args=(db, sort_field, WARM_LIMIT), daemon=True).start()
+    return known
+
+
+def known_emails_metrics():
+    lines = ["# TYPE known_emails_lookups_total counter"]
+    for name, known in sorted(_sets.items()):
+        lines.append(f'known_emails_lookups_total{{collection="{name}",result="hit"}} {known.hits}')
+        lines.append(f'known_emails_lookups_total{{collection="{name}",result="miss"}} {known.misses}')
+    lines.append("# TYPE known_emails_evictions_total counter")
+    for name, known in sorted(_sets.items()):
+        lines.append(f'known_emails_evictions_total{{collection="{name}"}} {known.evictions}')
+    lines.append("# TYPE known_emails_entries gauge")
+    for name, known in sorted(_sets.items()):
+        lines.append(f'known_emails_entries{{collection="{name}"}} {len(known)}')
+    lines.append("# TYPE known_emails_bytes gauge")
+    for name, known in sorted(_sets.items()):
+        lines.append(f'known_emails_bytes{{collection="{name}"}} {known.bytes}')
+    return lines
+
+
+register_collector(known_emails_metrics)
@@ -0,0 +1,175 @@
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Fields whose values never reach the logs verbatim
+EMAIL_FIELDS = {"email"}
+FREE_TEXT_FIELDS = {"frustration", "ai_coach_help", "confidence_area", "additional_features", "payload"}
+
+# Settings that did not parse, reported once logging is configured. api._db's
+# env helpers log through this module, so its own settings are parsed here.
+_invalid_settings = []
+
+
+def _setting(name, default, parse):
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return parse(value)
+    except ValueError:
+        _invalid_settings.append({"name": name, "value": value, "default": default})
+        return default
+
+
+def _level(value):
+    value = value.upper()
+    if not isinstance(logging.getLevelName(value), int):
+        raise ValueError(value)
+    return value
+
+
+def _fraction(value):
+    fraction = float(value)
+    if not 0.0 <= fraction <= 1.0:
+        raise ValueError(value)
+    return fraction
+
+
+LOG_LEVEL = _setting("LOG_LEVEL", "INFO", _level)
+# Fraction of sampled (high-volume) info lines that are kept
+LOG_SAMPLE_RATE = _setting("LOG_SAMPLE_RATE", 1.0, _fraction)
+
+_listener = None
+_root = logging.getLogger("thetruthschool")
+
+
+def redact_email(email):
+    """Keep the domain and a short stable hash of the address for correlation"""
+    if not isinstance(email, str) or "@" not in email:
+        return "[redacted]"
+    digest = hashlib.sha256(email.encode("utf-8")).hexdigest()[:12]
+    return f"{digest}@{email.rsplit('@', 1)[1]}"
+
+
+def redact(fields):
+    redacted = {}
+    for key, value in fields.items():
+        if key in EMAIL_FIELDS:
+            redacted[key] = redact_email(value)
+        elif key in FREE_TEXT_FIELDS:
+            redacted[key] = f"[redacted {len(str(value))} chars]"
+        else:
+            redacted[key] = value
+    return redacted
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; runs on the listener thread, off the request path"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(redact(fields))
+        if getattr(record, "error", None):
+            entry["error"] = record.error
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Skip the stdlib's eager message formatting; only the event name is needed
+        if record.exc_info:
+            record.error = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _SamplingFilter(logging.Filter):
+    def filter(self, record):
+        if getattr(record, "sampled", False) and record.levelno <= logging.INFO:
+            return LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE
+        return True
+
+
+def _configure():
+    global _listener
+
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(_SamplingFilter())
+
+    _root.setLevel(LOG_LEVEL)
+    _root.addHandler(handler)
+    _root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(flush)
+
+    for setting in _invalid_settings:
+        get_logger("logging").warning("invalid_setting", **setting)
+
+
+def flush():
+    """Stop the background writer after draining every queued line"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class StructuredLogger:
+    """Logs an event name plus keyword fields as one JSON line.
+
+    Pass ``sample=True`` for high-volume info lines so LOG_SAMPLE_RATE
+    applies to them. Email and free-text fields are redacted.
+    """
+
+    def __init__(self, name):
+        self._logger = _root.getChild(name)
+
+    def _log(self, level, event, sample, exc_info, fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, exc_info=exc_info,
+                             extra={"fields": fields, "sampled": sample})
+
+    def debug(self, event, sample=False, **fields):
+        self._log(logging.DEBUG, event, sample, None, fields)
+
+    def info(self, event, sample=False, **fields):
+        self._log(logging.INFO, event, sample, None, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, False, None, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, False, None, fields)
+
+    def exception(self, event, **fields):
+        self._log(logging.ERROR, event, False, True, fields)
+
+
+def get_logger(name):
+    _configure()
+    return StructuredLogger(name)
@@ -0,0 +1,159 @@
+import functools
+import threading
+import time
+from api._logging import get_logger
+
+log = get_logger("metrics")
+
+# Histogram bucket upper bounds in seconds, shared by every phase
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_histograms = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+class Histogram:
+    """Fixed-bucket latency histogram, safe to observe from many threads"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = len(BUCKETS)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class RequestTimer:
+    """Lap timer for one request.
+
+    mark(phase) charges the time since the previous mark to ``phase``;
+    record(phase, seconds) adds a separately measured duration, such as
+    one of several queries that ran concurrently.
+    """
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.phases = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def record(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in self.phases.items()]
+        entries.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def get_histogram(endpoint, phase):
+    key = (endpoint, phase)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.setdefault(key, Histogram())
+    return histogram
+
+
+def observe_request(endpoint, timer):
+    for phase, seconds in timer.phases.items():
+        get_histogram(endpoint, phase).observe(seconds)
+    get_histogram(endpoint, "total").observe(timer.elapsed())
+
+
+def instrumented(endpoint):
+    """Decorate a do_GET/do_POST method so it is timed under ``endpoint``.
+
+    The method gets ``self.timer`` to mark phases on, and every phase plus
+    the total is folded into the histograms when it returns.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            self.timer = RequestTimer()
+            try:
+                return method(self)
+            finally:
+                observe_request(endpoint, self.timer)
+        return wrapper
+    return decorate
+
+
+def send_timing_header(handler):
+    """Emit Server-Timing for the handler's current request, if it is timed"""
+    timer = getattr(handler, "timer", None)
+    if timer is not None:
+        handler.send_header("Server-Timing", timer.header())
+
+
+def register_collector(collector):
+    """Add a callable returning extra Prometheus exposition lines"""
+    with _registry_lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+
+def histogram_lines(name, labels, histogram):
+    """Prometheus bucket, sum and count lines for one labelled histogram.
+
+    ``labels`` is an already rendered label list such as 'a="x",b="y"', or "".
+    """
+    counts, total, count = histogram.snapshot()
+    bucket_prefix = f"{labels}," if labels else ""
+    label_set = f"{{{labels}}}" if labels else ""
+
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(BUCKETS, counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{{bucket_prefix}le="{float(bound)!r}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{bucket_prefix}le="+Inf"}} {count}')
+    lines.append(f"{name}_sum{label_set} {total}")
+    lines.append(f"{name}_count{label_set} {count}")
+    return lines
+
+
+def render_prometheus():
+    """Render every histogram and registered collector in Prometheus text format"""
+    lines = [
+        "# HELP api_request_phase_seconds Time spent in each phase of an API request.",
+        "# TYPE api_request_phase_seconds histogram",
+    ]
+    with _registry_lock:
+        items = sorted(_histograms.items())
+        collectors = list(_collectors)
+
+    for (endpoint, phase), histogram in items:
+        lines.extend(histogram_lines(
+            "api_request_phase_seconds", f'endpoint="{endpoint}",phase="{phase}"', histogram
+        ))
+
+    for collector in collectors:
+        try:
+            lines.extend(collector())
+        except Exception as e:
+            log.error("metrics_collector_failed", collector=getattr(collector, "__name__", str(collector)), error=str(e))
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,246 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pymongo import monitoring
+from api._db import env_int
+from api._logging import get_logger
+from api._metrics import Histogram, histogram_lines, register_collector
+
+log = get_logger("mongodb")
+
+# Commands slower than this are kept in the slow-command log
+SLOW_COMMAND_MS = env_int("MONGODB_SLOW_COMMAND_MS", 100)
+SLOW_LOG_SIZE = env_int("MONGODB_SLOW_LOG_SIZE", 50)
+
+# Only these commands get per-collection histograms; the rest are grouped as "other"
+TRACKED_COMMANDS = {"find", "getMore", "insert", "update", "delete", "count", "aggregate", "findAndModify", "createIndexes"}
+
+
+def _command_target(event):
+    """The collection a command runs against, if any"""
+    if event.command_name == "getMore":
+        return event.command.get("collection", "")
+    value = event.command.get(event.command_name)
+    return value if isinstance(value, str) else ""
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Per-command, per-collection latency plus a bounded slow-command log"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.failures = {}
+        self.slow_commands = deque(maxlen=SLOW_LOG_SIZE)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._inflight[(event.request_id, event.connection_id)] = _command_target(event)
+
+    def _finish(self, event, failed):
+        with self._lock:
+            collection = self._inflight.pop((event.request_id, event.connection_id), "")
+            command = event.command_name if event.command_name in TRACKED_COMMANDS else "other"
+            key = (command, collection)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            if failed:
+                self.failures[key] = self.failures.get(key, 0) + 1
+
+        seconds = event.duration_micros / 1e6
+        histogram.observe(seconds)
+
+        if seconds * 1000 >= SLOW_COMMAND_MS:
+            entry = {
+                "command": event.command_name,
+                "collection": collection,
+                "duration_ms": round(seconds * 1000, 2),
+                "failed": failed,
+                "at": datetime.utcnow().isoformat()
+            }
+            if failed:
+                entry["error"] = str(event.failure.get("errmsg", ""))[:200]
+            self.slow_commands.append(entry)
+            log.warning("slow_mongodb_command", **entry)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """Checkout wait time and pool occupancy, to tell pool starvation from slow queries"""
+
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.max_pool_size = 0
+        self.open_connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def pool_created(self, event):
+        with self._lock:
+            # Only non-default options are reported; pymongo's default maxPoolSize is 100
+            self.max_pool_size = event.options.get("maxPoolSize", 100)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(0, self.open_connections - 1)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+    def _checkout_finished(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+        return started
+
+    def connection_check_out_failed(self, event):
+        self._checkout_finished()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        started = self._checkout_finished()
+        if started is not None:
+            self.checkout_wait.observe(time.perf_counter() - started)
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def saturation(self):
+        with self._lock:
+            return self.checked_out / self.max_pool_size if self.max_pool_size else 0.0
+
+
+class HeartbeatListener(monitoring.ServerHeartbeatListener):
+    """Round-trip time and failures of the driver's own server heartbeats"""
+
+    def __init__(self):
+        self.last_rtt_ms = None
+        self.last_error = None
+        self.failures = 0
+        self.last_heartbeat = None
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.last_rtt_ms = round(event.duration * 1000, 2)
+        self.last_error = None
+        self.last_heartbeat = datetime.utcnow()
+
+    def failed(self, event):
+        self.failures += 1
+        self.last_error = str(event.reply)[:200]
+        self.last_heartbeat = datetime.utcnow()
+
+
+commands = CommandLatencyListener()
+pool = PoolListener()
+heartbeats = HeartbeatListener()
+
+
+def event_listeners():
+    """Listeners to pass to MongoClient(event_listeners=...)"""
+    return [commands, pool, heartbeats]
+
+
+def snapshot():
+    """JSON-friendly summary for the health endpoint"""
+    command_stats = {}
+    for (command, collection), histogram in list(commands.histograms.items()):
+        _, total, count = histogram.snapshot()
+        label = f"{command}:{collection}" if collection else command
+        command_stats[label] = {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 2) if count else 0.0,
+            "failures": commands.failures.get((command, collection), 0)
+        }
+
+    _, wait_total, wait_count = pool.checkout_wait.snapshot()
+    return {
+        "commands": command_stats,
+        "slow_commands": list(commands.slow_commands),
+        "pool": {
+            "max_size": pool.max_pool_size,
+            "open": pool.open_connections,
+            "checked_out": pool.checked_out,
+            "waiting": pool.waiting,
+            "saturation": round(pool.saturation(), 3),
+            "checkout_failures": pool.checkout_failures,
+            "clears": pool.pool_clears,
+            "avg_checkout_wait_ms": round(wait_total / wait_count * 1000, 3) if wait_count else 0.0
+        },
+        "heartbeat": {
+            "last_rtt_ms": heartbeats.last_rtt_ms,
+            "failures": heartbeats.failures,
+            "last_error": heartbeats.last_error
+        }
+    }
+
+
+def prometheus_lines():
+    lines = ["# TYPE mongodb_command_seconds histogram"]
+    for (command, collection), histogram in sorted(commands.histograms.items()):
+        lines.extend(histogram_lines(
+            "mongodb_command_seconds", f'command="{command}",collection="{collection}"', histogram
+        ))
+    lines.append("# TYPE mongodb_command_failures_total counter")
+    for (command, collection), failures in sorted(commands.failures.items()):
+        lines.append(f'mongodb_command_failures_total{{command="{command}",collection="{collection}"}} {failures}')
+
+    lines.append("# TYPE mongodb_pool_checkout_wait_seconds histogram")
+    lines.extend(histogram_lines("mongodb_pool_checkout_wait_seconds", "", pool.checkout_wait))
+    lines.append("# TYPE mongodb_pool_connections gauge")
+    lines.append(f'mongodb_pool_connections{{state="open"}} {pool.open_connections}')
+    lines.append(f'mongodb_pool_connections{{state="checked_out"}} {pool.checked_out}')
+    lines.append(f'mongodb_pool_connections{{state="max"}} {pool.max_pool_size}')
+    lines.append("# TYPE mongodb_pool_waiting gauge")
+    lines.append(f"mongodb_pool_waiting {pool.waiting}")
+    lines.append("# TYPE mongodb_pool_saturation gauge")
+    lines.append(f"mongodb_pool_saturation {pool.saturation()}")
+    lines.append("# TYPE mongodb_pool_checkout_failures_total counter")
+    lines.append(f"mongodb_pool_checkout_failures_total {pool.checkout_failures}")
+    lines.append("# TYPE mongodb_heartbeat_failures_total counter")
+    lines.append(f"mongodb_heartbeat_failures_total {heartbeats.failures}")
+    if heartbeats.last_rtt_ms is not None:
+        lines.append("# TYPE mongodb_heartbeat_rtt_seconds gauge")
+        lines.append(f"mongodb_heartbeat_rtt_seconds {heartbeats.last_rtt_ms / 1000}")
+    return lines
+
+
+register_collector(prometheus_lines)
@@ -0,0 +1,68 @@
+NEWSLETTER_COLLECTION = "newsletter_subscribers"
+
+# Newsletter preferences packed into one small integer, so a segment is a
+# set of mask values that an index on (preference_mask, _id) can seek to
+PREFERENCE_BITS = {
+    "weekly_updates": 1,
+    "product_updates": 2,
+    "career_tips": 4,
+}
+ALL_MASKS = range(1 << len(PREFERENCE_BITS))
+
+STATUSES = ("active", "unsubscribed")
+
+
+def preference_mask(preferences):
+    """Bitmask for a preferences dict; missing preferences default to opted in, as at signup"""
+    mask = 0
+    for name, bit in PREFERENCE_BITS.items():
+        if preferences.get(name, True):
+            mask |= bit
+    return mask
+
+
+def matching_masks(wanted):
+    """Every mask value consistent with {preference: True/False}; unnamed preferences may be either"""
+    required = sum(PREFERENCE_BITS[name] for name, value in wanted.items() if value)
+    excluded = sum(PREFERENCE_BITS[name] for name, value in wanted.items() if not value)
+    return [mask for mask in ALL_MASKS if mask & required == required and not mask & excluded]
+
+
+def segment_filter(wanted, status="active"):
+    """Query for subscribers with ``status`` whose preferences match ``wanted``.
+
+    An $in over the few matching mask values turns into index bounds on
+    the active_preference_mask partial index, where $bitsAllSet would
+    have to examine every entry.
+    """
+    mongo_filter = {"status": status}
+    masks = matching_masks(wanted)
+    if len(masks) < len(ALL_MASKS):
+        mongo_filter["preference_mask"] = {"$in": masks}
+    return mongo_filter
+
+
+def backfill_preference_masks(db):
+    """Set preference_mask on subscribers that predate it, one update_many per mask value.
+
+    Matches documents without the field, so it is safe to re-run and to
+    run while signups are arriving. Returns the number of documents updated.
+    """
+    collection = db[NEWSLETTER_COLLECTION]
+    updated = 0
+    for mask in ALL_MASKS:
+        mongo_filter = {"preference_mask": {"$exists": False}}
+        for name, bit in PREFERENCE_BITS.items():
+            # A missing preference counts as opted in, matching preference_mask()
+            mongo_filter[name] = {"$ne": False} if mask & bit else False
+        updated += collection.update_many(mongo_filter, {"$set": {"preference_mask": mask}}).modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    from api._db import get_database
+
+    database = get_database()
+    if database is None:
+        raise SystemExit("Database connection failed")
+    print(f"Backfilled preference_mask on {backfill_preference_masks(database)} subscribers")
@@ -0,0 +1,99 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING
+
+# Public name -> collection, timestamp field and projected fields. Reads go
+# through these projections so documents only carry what the views render.
+ENTRY_SOURCES = {
+    "waitlist": {
+        "collection": "waitlist_entries",
+        "sort_field": "created_at",
+        "fields": ["email", "created_at", "source"]
+    },
+    "feedback": {
+        "collection": "feedback_responses",
+        "sort_field": "created_at",
+        "fields": ["email", "frustration", "ai_coach_help", "confidence_area",
+                   "additional_features", "created_at", "source"]
+    },
+    "newsletter": {
+        "collection": "newsletter_subscribers",
+        "sort_field": "subscribed_at",
+        "fields": ["email", "weekly_updates", "product_updates", "career_tips",
+                   "subscribed_at", "source", "status"]
+    }
+}
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(doc, sort_field):
+    """Build an opaque ``before`` cursor pointing at ``doc``"""
+    timestamp = doc[sort_field]
+    if isinstance(timestamp, str):
+        return f"{timestamp}_{doc['_id']}"
+    return f"{timestamp.isoformat()}_{doc['_id']}"
+
+
+def decode_cursor(cursor):
+    """Parse a ``before`` cursor into (timestamp or None, ObjectId or None).
+
+    Accepts ``<iso timestamp>_<id>`` as returned by encode_cursor(), a bare
+    ISO timestamp, or a bare document id. Raises ValueError on anything else.
+    """
+    timestamp, _, raw_id = cursor.partition("_")
+    try:
+        if raw_id:
+            return datetime.fromisoformat(timestamp), ObjectId(raw_id)
+        if ObjectId.is_valid(cursor):
+            return None, ObjectId(cursor)
+        return datetime.fromisoformat(cursor), None
+    except (ValueError, InvalidId):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def serialize_entry(doc, sort_field):
+    """Make a projected document JSON-serializable in place"""
+    doc["_id"] = str(doc["_id"])
+    value = doc.get(sort_field)
+    if hasattr(value, "isoformat"):
+        doc[sort_field] = value.isoformat()
+    return doc
+
+
+def latest_entries(db, source, limit=3, before=None):
+    """Return up to ``limit`` entries newest first, starting strictly before the cursor.
+
+    The sort is served by the descending (timestamp, _id) index declared in
+    api/_indexes.py, so every page costs the same regardless of depth.
+    """
+    spec = ENTRY_SOURCES[source]
+    sort_field = spec["sort_field"]
+
+    collection = db[spec["collection"]]
+
+    query = {}
+    if before is not None:
+        timestamp, object_id = decode_cursor(before)
+        if timestamp is None:
+            # Bare id: look up where that document sits in the sort order
+            anchor = collection.find_one({"_id": object_id}, projection={sort_field: 1})
+            if anchor is None:
+                raise ValueError(f"Invalid cursor: {before}")
+            timestamp = anchor[sort_field]
+        if object_id is None:
+            query = {sort_field: {"$lt": timestamp}}
+        else:
+            query = {"$or": [
+                {sort_field: {"$lt": timestamp}},
+                {sort_field: timestamp, "_id": {"$lt": object_id}}
+            ]}
+
+    cursor = collection.find(
+        query,
+        projection={field: 1 for field in spec["fields"]},
+        sort=[(sort_field, DESCENDING), ("_id", DESCENDING)],
+        limit=min(limit, MAX_PAGE_SIZE)
+    )
+    return list(cursor)
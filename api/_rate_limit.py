@@ -0,0 +1,167 @@
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from api._db import env_int
+from api._logging import get_logger
+from api._metrics import register_collector
+from api._response import send_json
+
+log = get_logger("rate_limit")
+
+ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+# Clients tracked per endpoint; the least recently seen are forgotten beyond this
+MAX_CLIENTS = env_int("RATE_LIMIT_MAX_CLIENTS", 10000)
+
+# Vercel's edge overwrites these with the address it saw, so there they cannot be forged
+ON_VERCEL = bool(os.getenv("VERCEL"))
+PLATFORM_HEADERS = ("X-Vercel-Forwarded-For", "X-Real-IP")
+# Proxies elsewhere that each append the address they saw to X-Forwarded-For
+TRUSTED_PROXIES = max(0, env_int("RATE_LIMIT_TRUSTED_PROXIES", 0))
+
+# Endpoint -> (requests per minute, burst). Override with RATE_LIMIT_<ENDPOINT>="<per minute>/<burst>".
+RATE_LIMITS = {
+    "waitlist": (10, 5),
+    "newsletter": (10, 5),
+    "feedback": (10, 5),
+    "submit": (10, 5),
+    "stats": (120, 30),
+    "analytics": (60, 20),
+    "bulk_import": (6, 2),
+}
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def _configured_limit(endpoint):
+    per_minute, burst = RATE_LIMITS[endpoint]
+    value = os.getenv(f"RATE_LIMIT_{endpoint.upper()}")
+    if value:
+        try:
+            per_minute, burst = (int(part) for part in value.split("/"))
+        except ValueError:
+            log.warning("invalid_setting", name=f"RATE_LIMIT_{endpoint.upper()}", value=value)
+    return per_minute, burst
+
+
+class TokenBucketLimiter:
+    """Token bucket per client key, kept in a bounded LRU.
+
+    Each client starts with ``burst`` tokens, gains ``rate`` tokens per
+    second up to ``burst``, and spends one per request. Evicting an idle
+    client only forgets its history, i.e. hands it a full bucket again.
+    """
+
+    def __init__(self, rate, burst, max_clients):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.allowed = 0
+        self.limited = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key):
+        """Spend a token for ``key``. Returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+                if len(self._buckets) >= self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                tokens, last = bucket
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                self._buckets.move_to_end(key)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self.allowed += 1
+                return 0
+
+            self._buckets[key] = (tokens, now)
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+
+def get_limiter(endpoint):
+    with _registry_lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            per_minute, burst = _configured_limit(endpoint)
+            limiter = _limiters[endpoint] = TokenBucketLimiter(per_minute / 60.0, burst, MAX_CLIENTS)
+        return limiter
+
+
+def client_key(handler):
+    """The caller's IP, read only from headers a trusted proxy set, else the socket peer.
+
+    Left of the hops trusted proxies append, X-Forwarded-For is whatever
+    the client sent, so keying on it would hand a fresh bucket to every
+    forged value and push real clients out of the LRU.
+    """
+    if ON_VERCEL:
+        for name in PLATFORM_HEADERS:
+            value = handler.headers.get(name)
+            if value:
+                return value.split(",", 1)[0].strip()
+    if TRUSTED_PROXIES:
+        forwarded = handler.headers.get("X-Forwarded-For")
+        if forwarded:
+            hops = forwarded.split(",")
+            if len(hops) >= TRUSTED_PROXIES:
+                return hops[-TRUSTED_PROXIES].strip()
+    return handler.client_address[0] if handler.client_address else ""
+
+
+def send_rate_limited(handler, retry_after):
+    # The request body is left unread, so the connection cannot be reused
+    handler.close_connection = True
+    send_json(handler, {"error": "Too many requests, please try again later", "success": False}, 429, {
+        'Retry-After': str(max(1, math.ceil(retry_after))),
+        'Connection': 'close'
+    })
+
+
+def rate_limited(endpoint):
+    """Decorate a do_GET/do_POST method so over-limit clients get 429 before it runs.
+
+    Nothing has been read from the request body at that point, so a
+    throttled client costs no parsing and no database work.
+    """
+    def decorate(method):
+        if not ENABLED:
+            return method
+        limiter = get_limiter(endpoint)
+
+        @functools.wraps(method)
+        def wrapper(self):
+            retry_after = limiter.acquire(client_key(self))
+            if retry_after:
+                log.info("rate_limited", sample=True, endpoint=endpoint)
+                send_rate_limited(self, retry_after)
+                return
+            return method(self)
+        return wrapper
+    return decorate
+
+
+def rate_limit_metrics():
+    lines = ["# TYPE rate_limit_requests_total counter"]
+    for endpoint, limiter in sorted(_limiters.items()):
+        lines.append(f'rate_limit_requests_total{{endpoint="{endpoint}",result="allowed"}} {limiter.allowed}')
+        lines.append(f'rate_limit_requests_total{{endpoint="{endpoint}",result="limited"}} {limiter.limited}')
+    lines.append("# TYPE rate_limit_clients gauge")
+    for endpoint, limiter in sorted(_limiters.items()):
+        lines.append(f'rate_limit_clients{{endpoint="{endpoint}"}} {len(limiter)}')
+    return lines
+
+
+register_collector(rate_limit_metrics)
@@ -0,0 +1,51 @@
+import hmac
+from api._db import env_int
+
+# Largest JSON body the form endpoints accept; a signup or quiz answer is well under 2 KB
+MAX_BODY_BYTES = env_int("MAX_BODY_BYTES", 16 * 1024)
+
+
+class RequestError(Exception):
+    """A client error to report with ``status`` and ``message``"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def read_body(handler, max_bytes=MAX_BODY_BYTES):
+    """Read the request body, checking Content-Length before reading anything.
+
+    Raises RequestError(411) without a Content-Length, (413) when it is
+    over ``max_bytes``, and (400) when it is not a number.
+    """
+    header = handler.headers.get('Content-Length')
+    if header is None:
+        raise RequestError(411, "Content-Length is required")
+    try:
+        length = int(header)
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length")
+    if length < 0:
+        raise RequestError(400, "Invalid Content-Length")
+    if length > max_bytes:
+        # Leave the body unread and end the connection rather than drain it
+        handler.close_connection = True
+        raise RequestError(413, f"Request body must be at most {max_bytes} bytes")
+    return handler.rfile.read(length)
+
+
+def require_token(handler, token):
+    """Check the request's ``Authorization: Bearer`` header against ``token``.
+
+    Fails closed: raises RequestError(503) when no token is configured,
+    so an admin endpoint whose secret is missing is disabled rather than
+    public, and (401) when the header does not carry the token. The
+    comparison takes constant time.
+    """
+    if not token:
+        raise RequestError(503, "Endpoint is disabled until its access token is configured")
+    supplied = handler.headers.get('Authorization') or ""
+    if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+        raise RequestError(401, "Unauthorized")
@@ -0,0 +1,129 @@
+import functools
+import gzip
+from api._codec import dumps
+from api._db import env_int
+from api._metrics import send_timing_header
+
+# brotli is optional: it packs JSON tighter than gzip at a similar speed, and
+# responses fall back to gzip when it is not installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies below this fit in a packet or two as they are; compressing them only costs CPU
+COMPRESS_MIN_BYTES = env_int("RESPONSE_COMPRESS_MIN_BYTES", 1024)
+GZIP_LEVEL = env_int("RESPONSE_GZIP_LEVEL", 6)
+# Quality 4 is brotli's usual setting for dynamic responses; 11 is meant for static assets
+BROTLI_QUALITY = env_int("RESPONSE_BROTLI_QUALITY", 4)
+
+ENCODERS = {"gzip": lambda body: gzip.compress(body, GZIP_LEVEL, mtime=0)}
+if brotli is not None:
+    ENCODERS["br"] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+
+# Tie-break when the client weighs several encodings equally
+PREFERRED_ENCODINGS = tuple(name for name in ("br", "gzip") if name in ENCODERS)
+
+
+@functools.lru_cache(maxsize=128)
+def negotiate_encoding(accept_encoding):
+    """The content coding to use for an Accept-Encoding value, or None for identity.
+
+    Clients send a handful of distinct header values, so results are memoized.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip()] = weight
+
+    best, best_weight = None, 0.0
+    for name in PREFERRED_ENCODINGS:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def choose_encoding(handler, size):
+    """The encoding for a ``size``-byte body sent to this request's client, or None"""
+    if size < COMPRESS_MIN_BYTES:
+        return None
+    return negotiate_encoding(handler.headers.get("Accept-Encoding") or "")
+
+
+def entity_tag(etag, encoding):
+    """Compressed representations get a weak ETag, as they are not byte-identical to the original"""
+    return etag if encoding is None else "W/" + etag
+
+
+def _mark(handler, phase):
+    timer = getattr(handler, "timer", None)
+    if timer is not None:
+        timer.mark(phase)
+
+
+def send_body(handler, body, status_code=200, content_type="application/json", headers=None, etag=None, encoded=None):
+    """Write a complete response, compressed when it is large enough and the client accepts it.
+
+    ``encoded`` is an optional {encoding: compressed body} memo for a
+    body sent many times, such as a cached response, so each encoding is
+    compressed once.
+    """
+    encoding = choose_encoding(handler, len(body))
+    if encoding is not None:
+        compressed = encoded.get(encoding) if encoded is not None else None
+        if compressed is None:
+            compressed = ENCODERS[encoding](body)
+            if encoded is not None:
+                encoded[encoding] = compressed
+        body = compressed
+        _mark(handler, "compress")
+
+    handler.send_response(status_code)
+    handler.send_header('Content-type', content_type)
+    handler.send_header('Content-Length', str(len(body)))
+    if encoding is not None:
+        handler.send_header('Content-Encoding', encoding)
+    # The bytes depend on Accept-Encoding, so shared caches must key on it
+    handler.send_header('Vary', 'Accept-Encoding')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    if etag is not None:
+        handler.send_header('ETag', entity_tag(etag, encoding))
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+    send_timing_header(handler)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def send_json(handler, data, status_code=200, headers=None):
+    """Serialize ``data`` compactly and send it with send_body()"""
+    body = dumps(data)
+    _mark(handler, "serialize")
+    send_body(handler, body, status_code, headers=headers)
+
+
+class JSONResponder:
+    """send_success_response() and send_error_response() for a request handler.
+
+    List it before BaseHTTPRequestHandler in the handler's bases.
+    ``success_status`` is the default status of success responses and
+    ``success_headers`` are added to them, e.g. a Cache-Control policy.
+    """
+
+    success_status = 200
+    success_headers = None
+
+    def send_success_response(self, data, status_code=None):
+        send_json(self, data, status_code or self.success_status, self.success_headers)
+
+    def send_error_response(self, status_code, message):
+        send_json(self, {"error": message, "success": False}, status_code)
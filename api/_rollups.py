@@ -0,0 +1,197 @@
+import re
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, UpdateOne
+from api._logging import get_logger
+
+log = get_logger("rollups")
+
+# Pre-aggregated feedback analytics, one document per hour and per day.
+# _id is "<granularity>:<bucket start>" in ISO form, so a time range is a
+# range scan on the _id index.
+ROLLUPS_COLLECTION = "feedback_rollups"
+FEEDBACK_COLLECTION = "feedback_responses"
+
+GRANULARITIES = {
+    "hour": "%Y-%m-%dT%H",
+    "day": "%Y-%m-%d",
+}
+
+# The multiple-choice question's options, as rendered by the quiz form.
+# Anything else is counted as "other" so rollup documents stay bounded.
+CONFIDENCE_AREAS = {
+    "data_structures_algorithms": "Data Structures & Algorithms",
+    "system_design": "System Design",
+    "explaining_your_thought_process": "Explaining Your Thought Process",
+    "company_specific_questions": "Company-Specific Questions",
+}
+OTHER = "other"
+
+# Free-text answers have no meaningful distribution; their length is rolled up instead
+TEXT_FIELDS = ("frustration", "ai_coach_help")
+OPTIONAL_FIELDS = ("additional_features",)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def answer_key(answer):
+    key = _NON_WORD.sub("_", str(answer).lower()).strip("_")
+    return key if key in CONFIDENCE_AREAS else OTHER
+
+
+def bucket_start(timestamp, granularity):
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_id(timestamp, granularity):
+    return f"{granularity}:{timestamp.strftime(GRANULARITIES[granularity])}"
+
+
+def feedback_increments(document):
+    """The counters one feedback document adds to its buckets"""
+    increments = {
+        "total": 1,
+        f"confidence_area.{answer_key(document.get('confidence_area', ''))}": 1,
+    }
+    for field in TEXT_FIELDS:
+        increments[f"text_chars.{field}"] = len(document.get(field) or "")
+    for field in OPTIONAL_FIELDS:
+        if document.get(field):
+            increments[f"answered.{field}"] = 1
+    return increments
+
+
+def add_increments(buckets, documents):
+    """Fold documents into {rollup _id: (granularity, bucket start, {field: amount})}"""
+    for document in documents:
+        created_at = document.get("created_at")
+        if not isinstance(created_at, datetime):
+            continue
+        increments = feedback_increments(document)
+        for granularity in GRANULARITIES:
+            key = rollup_id(created_at, granularity)
+            if key not in buckets:
+                buckets[key] = (granularity, bucket_start(created_at, granularity), {})
+            totals = buckets[key][2]
+            for field, amount in increments.items():
+                totals[field] = totals.get(field, 0) + amount
+    return buckets
+
+
+def record_feedback(db, documents):
+    """$inc the hourly and daily rollups for newly inserted feedback, in one round trip. Never raises."""
+    if db is None or not documents:
+        return
+    buckets = add_increments({}, documents)
+    operations = [
+        UpdateOne(
+            {"_id": key},
+            {"$inc": totals, "$setOnInsert": {"granularity": granularity, "bucket": start}},
+            upsert=True
+        )
+        for key, (granularity, start, totals) in buckets.items()
+    ]
+    try:
+        db[ROLLUPS_COLLECTION].bulk_write(operations, ordered=False)
+    except Exception as e:
+        log.error("rollup_update_failed", documents=len(documents), error=str(e))
+
+
+def read_rollups(db, granularity, start, end):
+    """Rollup documents with bucket start in [start, end), oldest first"""
+    cursor = db[ROLLUPS_COLLECTION].find({
+        "_id": {"$gte": rollup_id(start, granularity), "$lt": rollup_id(end, granularity)}
+    }).sort("_id", ASCENDING)
+    return list(cursor)
+
+
+def summarize(rollup):
+    """Render a rollup document (or a sum of them) for the API"""
+    total = rollup.get("total", 0)
+    areas = rollup.get("confidence_area", {})
+    text_chars = rollup.get("text_chars", {})
+    answered = rollup.get("answered", {})
+
+    distribution = {label: areas.get(key, 0) for key, label in CONFIDENCE_AREAS.items()}
+    if areas.get(OTHER):
+        distribution["Other"] = areas[OTHER]
+
+    return {
+        "total": total,
+        "confidence_area": distribution,
+        "answered": {field: answered.get(field, 0) for field in OPTIONAL_FIELDS},
+        "avg_length": {
+            field: round(text_chars.get(field, 0) / total, 1) if total else 0.0
+            for field in TEXT_FIELDS
+        }
+    }
+
+
+def merge(rollups):
+    """Add several rollup documents' counters together"""
+    merged = {"total": 0}
+    for rollup in rollups:
+        merged["total"] += rollup.get("total", 0)
+        for group in ("confidence_area", "text_chars", "answered"):
+            target = merged.setdefault(group, {})
+            for key, amount in rollup.get(group, {}).items():
+                target[key] = target.get(key, 0) + amount
+    return merged
+
+
+def backfill_rollups(db, batch_size=1000):
+    """Rebuild every rollup from the raw feedback with one projected scan.
+
+    Like reconcile_counters(), this overwrites the rollups with what the
+    scan saw, so feedback arriving while it runs may be missed; run it
+    before traffic reaches the incremental path, or at a quiet time.
+    Returns (documents scanned, rollup documents written).
+    """
+    projection = {"created_at": 1, "confidence_area": 1, "_id": 0}
+    projection.update({field: 1 for field in TEXT_FIELDS + OPTIONAL_FIELDS})
+
+    buckets = {}
+    scanned = 0
+    batch = []
+    for document in db[FEEDBACK_COLLECTION].find({}, projection=projection, batch_size=batch_size):
+        batch.append(document)
+        scanned += 1
+        if len(batch) >= batch_size:
+            add_increments(buckets, batch)
+            batch = []
+    add_increments(buckets, batch)
+
+    operations = []
+    for key, (granularity, start, totals) in buckets.items():
+        document = {"granularity": granularity, "bucket": start, "total": totals.get("total", 0),
+                    "confidence_area": {}, "text_chars": {}, "answered": {},
+                    "backfilled_at": datetime.utcnow()}
+        for field, amount in totals.items():
+            if field != "total":
+                group, name = field.split(".", 1)
+                document[group][name] = amount
+        operations.append(UpdateOne({"_id": key}, {"$set": document}, upsert=True))
+
+    collection = db[ROLLUPS_COLLECTION]
+    collection.delete_many({"_id": {"$nin": list(buckets)}})
+    for i in range(0, len(operations), batch_size):
+        collection.bulk_write(operations[i:i + batch_size], ordered=False)
+    return scanned, len(operations)
+
+
+def default_range(granularity, now=None):
+    """The last 48 hours or the last 30 days, ending with the current bucket"""
+    now = now or datetime.utcnow()
+    end = bucket_start(now, granularity) + (timedelta(hours=1) if granularity == "hour" else timedelta(days=1))
+    return end - (timedelta(hours=48) if granularity == "hour" else timedelta(days=30)), end
+
+
+if __name__ == "__main__":
+    from api._db import get_database
+
+    database = get_database()
+    if database is None:
+        raise SystemExit("Database connection failed")
+    scanned, written = backfill_rollups(database)
+    print(f"Rebuilt {written} feedback rollups from {scanned} responses")
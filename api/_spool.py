@@ -0,0 +1,313 @@
+import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from bson import ObjectId, json_util
+from pymongo.errors import ConnectionFailure
+from api._breaker import mongo_breaker
+from api._cache import invalidate
+from api._counters import increment_counter
+from api._db import get_database, insert_if_absent
+from api._logging import get_logger
+from api._metrics import register_collector
+from api._rollups import FEEDBACK_COLLECTION, record_feedback
+
+log = get_logger("spool")
+
+# Append-only journal of submissions accepted while MongoDB was unreachable.
+# /tmp is the only writable path on Vercel and it lives as long as the instance.
+SPOOL_PATH = os.getenv("SPOOL_PATH", os.path.join(tempfile.gettempdir(), "thetruthschool-spool.ndjson"))
+
+# Journal operations: a signup is an upsert keyed on email, anything else an insert keyed on _id
+SIGNUP = "signup"
+INSERT = "insert"
+
+
+class Journal:
+    """NDJSON journal with group commit.
+
+    append() returns once its entry is on disk. A single writer thread
+    takes every entry queued since its last pass, writes them with one
+    write() and makes them durable with one fsync(), so concurrent
+    appenders share the cost of the sync.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.replay_path = path + ".replay"
+
+        self.appended = 0
+        self.fsyncs = 0
+        self.replayed = 0
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer = None
+
+    def append(self, *entries, timeout=5.0):
+        """Write entries durably, raising OSError if they could not be synced"""
+        waiter = {"done": threading.Event(), "error": None}
+        lines = "".join(json_util.dumps(entry) + "\n" for entry in entries)
+
+        with self._lock:
+            self._pending.append((lines, waiter))
+            self._ensure_writer()
+        self._wakeup.set()
+
+        if not waiter["done"].wait(timeout):
+            raise OSError(f"Timed out writing to {self.path}")
+        if waiter["error"] is not None:
+            raise waiter["error"]
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._run, daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                batch = self._pending
+                self._pending = []
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        error = None
+        try:
+            with self._file_lock:
+                created = not os.path.exists(self.path)
+                with open(self.path, "a", encoding="utf-8") as journal_file:
+                    journal_file.write("".join(lines for lines, _ in batch))
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+                if created:
+                    _fsync_directory(self.path)
+            self.fsyncs += 1
+        except OSError as e:
+            log.error("spool_write_failed", path=self.path, entries=len(batch), error=str(e))
+            error = e
+
+        for lines, waiter in batch:
+            if error is None:
+                self.appended += lines.count("\n")
+            waiter["error"] = error
+            waiter["done"].set()
+
+    def has_pending(self):
+        return any(os.path.exists(path) and os.path.getsize(path) for path in (self.replay_path, self.path))
+
+    def claim(self):
+        """Move the live journal aside for replay and return the file to replay, or None.
+
+        A replay file left by an interrupted replay is returned first; the
+        live journal is only rotated once that one has been drained.
+        """
+        if os.path.exists(self.replay_path):
+            return self.replay_path
+        with self._file_lock:
+            if not os.path.exists(self.path) or not os.path.getsize(self.path):
+                return None
+            os.replace(self.path, self.replay_path)
+        return self.replay_path
+
+    def read(self, path):
+        entries = []
+        with open(path, encoding="utf-8") as journal_file:
+            for number, line in enumerate(journal_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json_util.loads(line))
+                except ValueError:
+                    # A crash mid-write can leave a torn final line
+                    log.warning("spool_entry_unreadable", path=path, line=number)
+        return entries
+
+    def stats(self):
+        pending_bytes = sum(os.path.getsize(path) for path in (self.replay_path, self.path) if os.path.exists(path))
+        return {
+            "appended": self.appended,
+            "fsyncs": self.fsyncs,
+            "replayed": self.replayed,
+            "pending_bytes": pending_bytes
+        }
+
+
+def _fsync_directory(path):
+    """Make a newly created file's directory entry durable too"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+journal = Journal(SPOOL_PATH)
+_replay_lock = threading.Lock()
+
+
+def make_entry(collection_name, op, document):
+    if op == INSERT:
+        # A fixed _id makes replaying an insert idempotent. pymongo has already
+        # set one if the live insert was attempted, which covers inserts that
+        # reached the server before the connection dropped.
+        document.setdefault("_id", ObjectId())
+    return {
+        "id": uuid.uuid4().hex,
+        "collection": collection_name,
+        "op": op,
+        "document": document,
+        "spooled_at": datetime.utcnow()
+    }
+
+
+def write_or_spool(collection_name, op, document, write):
+    """Run ``write(collection)`` through the MongoDB breaker, journaling on failure.
+
+    When the circuit is open, the database is unconfigured, or the write
+    fails to reach the server, ``document`` goes to the journal instead,
+    to be written by replay() later. Returns (write result, spooled).
+    """
+    def guarded():
+        db = get_database()
+        if db is None:
+            raise ConnectionFailure("Database connection failed")
+        return write(db[collection_name])
+
+    try:
+        result = mongo_breaker.call(guarded)
+    except ConnectionFailure as e:
+        log.warning("spooling_submission", collection=collection_name, reason=type(e).__name__)
+        journal.append(make_entry(collection_name, op, document))
+        return None, True
+
+    # Failures too few to open the circuit journal entries without a close
+    # to replay them; a write getting through is the cue to drain them
+    replay_in_background()
+    return result, False
+
+
+def spool_documents(collection_name, op, documents):
+    """Journal several documents with a single sync"""
+    if documents:
+        journal.append(*[make_entry(collection_name, op, document) for document in documents])
+
+
+def apply_entry(db, entry):
+    """Write one journal entry; safe to repeat.
+
+    Returns True when the entry's own document is stored, whether this
+    call wrote it or an earlier attempt did: a live write whose reply was
+    lost, or a replay interrupted before it counted. Nothing else counts
+    a journaled document, so replay() counts every True exactly once, when
+    the file is done. False is a signup for an address another document holds.
+    """
+    document = dict(entry["document"])
+    collection = db[entry["collection"]]
+
+    if entry["op"] == SIGNUP:
+        fields = dict(document)
+        if insert_if_absent(collection, fields.pop("email"), fields):
+            return True
+        # An earlier attempt stored this very document when every field matches, timestamps included
+        return collection.find_one(document, projection={"_id": 1}) is not None
+
+    document_id = document.pop("_id")
+    collection.update_one({"_id": document_id}, {"$setOnInsert": document}, upsert=True)
+    return True
+
+
+def replay(wait=False):
+    """Drain the journal into MongoDB. Returns the number of entries applied.
+
+    Stops, leaving the rest on disk, as soon as MongoDB is unreachable.
+    Entries applied before an interruption are applied and counted on the
+    next replay, which is harmless because apply_entry() is idempotent and
+    recognizes documents an earlier attempt stored.
+    """
+    if not _replay_lock.acquire(blocking=wait):
+        return 0
+
+    applied = 0
+    try:
+        db = get_database()
+        if db is None:
+            return 0
+
+        while True:
+            path = journal.claim()
+            if path is None:
+                break
+
+            # Counted once the whole file is applied; an interrupted file is counted by the replay that finishes it
+            inserted = {}
+            new_feedback = []
+            file_applied = 0
+            for entry in journal.read(path):
+                try:
+                    stored = mongo_breaker.call(apply_entry, db, entry)
+                except ConnectionFailure as e:
+                    log.warning("spool_replay_interrupted", applied=applied, error=str(e))
+                    return applied
+                except Exception as e:
+                    log.error("spool_entry_failed", id=entry.get("id"), collection=entry.get("collection"), error=str(e))
+                    continue
+                applied += 1
+                file_applied += 1
+                if stored:
+                    inserted[entry["collection"]] = inserted.get(entry["collection"], 0) + 1
+                    if entry["collection"] == FEEDBACK_COLLECTION:
+                        new_feedback.append(entry["document"])
+
+            for collection_name, count in inserted.items():
+                increment_counter(db, collection_name, count)
+            record_feedback(db, new_feedback)
+            if inserted:
+                invalidate("stats")
+
+            os.remove(path)
+            journal.replayed += file_applied
+            log.info("spool_replayed", entries=file_applied, inserted=sum(inserted.values()))
+    finally:
+        _replay_lock.release()
+
+    return applied
+
+
+def replay_in_background():
+    """Start replay() on a thread when entries are waiting and no replay is running"""
+    if journal.has_pending() and not _replay_lock.locked():
+        threading.Thread(target=replay, daemon=True).start()
+
+
+def spool_metrics():
+    stats = journal.stats()
+    lines = ["# TYPE spool_entries_total counter"]
+    for state in ("appended", "replayed"):
+        lines.append(f'spool_entries_total{{state="{state}"}} {stats[state]}')
+    lines.append("# TYPE spool_fsyncs_total counter")
+    lines.append(f"spool_fsyncs_total {stats['fsyncs']}")
+    lines.append("# TYPE spool_pending_bytes gauge")
+    lines.append(f"spool_pending_bytes {stats['pending_bytes']}")
+    return lines
+
+
+register_collector(spool_metrics)
+mongo_breaker.on_close(replay_in_background)
+
+if __name__ == "__main__":
+    print(f"Replayed {replay(wait=True)} journal entries from {SPOOL_PATH}")
+else:
+    # Pick up entries journaled by an earlier process on this instance
+    replay_in_background()
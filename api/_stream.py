@@ -0,0 +1,128 @@
+import csv
+import io
+import itertools
+from datetime import datetime
+from api._codec import dumps
+from api._metrics import send_timing_header
+
+# Download formats shared by /api/export and /api/segments
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+MAX_BATCH_SIZE = 5000
+
+# Spreadsheets evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def parse_batch_size(query, default):
+    """?batch_size= clamped to 1..MAX_BATCH_SIZE; raises ValueError when it is not a number"""
+    try:
+        batch_size = int(query.get('batch_size', [default])[0])
+    except ValueError:
+        raise ValueError("batch_size must be an integer")
+    return max(1, min(batch_size, MAX_BATCH_SIZE))
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (bool, int, float)):
+        return value
+    if not isinstance(value, str):
+        value = json_default(value)
+    # A leading quote makes spreadsheets show the cell as text instead of running it
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+def prefetch(cursor):
+    """Run ``cursor``'s first round trip now; returns an iterator over all its documents.
+
+    find() is lazy, so without this the query would first reach the server
+    after the download's 200 and headers were sent, and a failing database
+    could only truncate the response instead of answering with an error.
+    """
+    try:
+        first = next(cursor, None)
+    except Exception:
+        cursor.close()
+        raise
+    if first is None:
+        return iter(())
+    return itertools.chain((first,), cursor)
+
+
+class Download:
+    """A chunked NDJSON or CSV attachment, written ``batch_size`` documents per chunk.
+
+    ``sent`` counts the documents written so far, so a caller can report
+    how far a failed download got.
+    """
+
+    def __init__(self, handler, output, filename, batch_size, columns=None):
+        self.handler = handler
+        self.output = output
+        self.filename = filename
+        self.batch_size = batch_size
+        self.columns = columns
+        self.sent = 0
+
+    def start(self):
+        """Send the headers; the handler needs protocol_version = 'HTTP/1.1' for chunking"""
+        handler = self.handler
+        handler.send_response(200)
+        handler.send_header('Content-type', FORMATS[self.output])
+        handler.send_header('Content-Disposition', f'attachment; filename="{self.filename}"')
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.send_header('Access-Control-Allow-Origin', '*')
+        send_timing_header(handler)
+        handler.end_headers()
+
+    def send(self, documents):
+        """Write every document, then the final chunk that marks the download complete.
+
+        If this raises, the headers are already out: close the connection
+        without the final chunk so the client sees the download as incomplete.
+        """
+        if self.output == "csv":
+            self.send_csv(documents)
+        else:
+            self.send_ndjson(documents)
+        self.write_chunk(b"")
+
+    def send_ndjson(self, documents):
+        lines = []
+        for doc in documents:
+            lines.append(dumps(doc, default=json_default))
+            self.sent += 1
+            if len(lines) >= self.batch_size:
+                self.write_chunk(b"\n".join(lines) + b"\n")
+                lines = []
+        if lines:
+            self.write_chunk(b"\n".join(lines) + b"\n")
+
+    def send_csv(self, documents):
+        columns = ["_id"] + [column for column in self.columns if column != "_id"]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+        for doc in documents:
+            writer.writerow([csv_value(doc.get(column)) for column in columns])
+            self.sent += 1
+            if self.sent % self.batch_size == 0:
+                self.write_chunk(buffer.getvalue().encode('utf-8'))
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            self.write_chunk(buffer.getvalue().encode('utf-8'))
+
+    def write_chunk(self, data):
+        self.handler.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
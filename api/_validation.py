@@ -0,0 +1,174 @@
+import re
+from api._request import RequestError
+
+EMAIL_PATTERN = re.compile(r'^[^\s@]+@[^\s@]+\.[^\s@]+$')
+# RFC 5321 limit on a forward path
+MAX_EMAIL_LENGTH = 254
+
+def normalize_email(email):
+    return email.strip().lower()
+
+def is_valid_email(email):
+    return EMAIL_PATTERN.match(email) is not None
+
+
+class ValidationError(RequestError):
+    def __init__(self, message):
+        super().__init__(400, message)
+
+
+class Field:
+    """One payload field.
+
+    ``kind`` is "email" (trimmed, lowercased, pattern-checked), "text"
+    (coerced to a trimmed string), "flag" (a JSON boolean) or "object"
+    (validated against a nested ``schema``). A missing optional field
+    takes ``default``.
+    """
+
+    def __init__(self, name, kind, required=False, default=None, max_length=None, schema=None, label=None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.max_length = max_length
+        self.schema = schema
+        self.label = label or name
+
+
+def _compile_field(field):
+    """Build the per-field check once, so validate() is a flat loop of calls"""
+    name, label, required, default = field.name, field.label, field.required, field.default
+    missing = object()
+
+    if field.kind == "email":
+        max_length = field.max_length or MAX_EMAIL_LENGTH
+        match = EMAIL_PATTERN.match
+
+        def check(data):
+            value = data.get(name, missing)
+            if value is missing or (required and isinstance(value, str) and not value.strip()):
+                if required:
+                    raise ValidationError(f"{label} is required")
+                return default
+            if not isinstance(value, str):
+                raise ValidationError("Invalid email format")
+            value = value.strip().lower()
+            if len(value) > max_length or match(value) is None:
+                raise ValidationError("Invalid email format")
+            return value
+
+    elif field.kind == "text":
+        max_length = field.max_length
+
+        def check(data):
+            value = data.get(name, missing)
+            value = "" if value is missing or value is None else str(value).strip()
+            if not value:
+                if required:
+                    raise ValidationError(f"{label} is required")
+                return default if default is not None else value
+            if max_length is not None and len(value) > max_length:
+                raise ValidationError(f"{label} must be at most {max_length} characters")
+            return value
+
+    elif field.kind == "flag":
+        def check(data):
+            value = data.get(name, missing)
+            if value is True or value is False:
+                return value
+            if value is missing:
+                if required:
+                    raise ValidationError(f"{label} is required")
+                return default
+            raise ValidationError(f"{label} must be true or false")
+
+    elif field.kind == "object":
+        validate = field.schema.validate
+
+        def check(data):
+            value = data.get(name, missing)
+            if isinstance(value, dict):
+                return validate(value)
+            if value is missing or value is None:
+                if required:
+                    raise ValidationError(f"{label} is required")
+                return validate({})
+            raise ValidationError(f"{label} must be an object")
+
+    else:
+        raise ValueError(f"Unknown field kind {field.kind!r}")
+
+    return name, check
+
+
+class Schema:
+    """Declarative payload schema, compiled into field checks when defined.
+
+    validate() returns a new dict holding only the declared fields,
+    cleaned, or raises ValidationError for the first invalid one.
+    """
+
+    def __init__(self, *fields, message="Request body must be a JSON object"):
+        self.fields = fields
+        self.message = message
+        self._checks = [_compile_field(field) for field in fields]
+
+    def validate(self, data):
+        if not isinstance(data, dict):
+            raise ValidationError(self.message)
+        # A plain loop: before Python 3.12 a comprehension is one more function call
+        cleaned = {}
+        for name, check in self._checks:
+            cleaned[name] = check(data)
+        return cleaned
+
+
+WAITLIST_SCHEMA = Schema(
+    Field("email", "email", required=True, label="Email"),
+    message="Email is required"
+)
+
+PREFERENCES_SCHEMA = Schema(
+    Field("weekly_updates", "flag", default=True, label="preferences.weekly_updates"),
+    Field("product_updates", "flag", default=True, label="preferences.product_updates"),
+    Field("career_tips", "flag", default=True, label="preferences.career_tips"),
+)
+
+NEWSLETTER_SCHEMA = Schema(
+    Field("email", "email", required=True, label="Email"),
+    Field("preferences", "object", schema=PREFERENCES_SCHEMA),
+    message="Email is required"
+)
+
+# Free-text answers are capped well above anything the quiz form produces
+FEEDBACK_TEXT_LIMIT = 5000
+
+FEEDBACK_ANSWER_FIELDS = (
+    Field("frustration", "text", required=True, max_length=FEEDBACK_TEXT_LIMIT),
+    Field("ai_coach_help", "text", required=True, max_length=FEEDBACK_TEXT_LIMIT),
+    Field("confidence_area", "text", required=True, max_length=FEEDBACK_TEXT_LIMIT),
+    Field("additional_features", "text", default="", max_length=FEEDBACK_TEXT_LIMIT),
+)
+
+FEEDBACK_SCHEMA = Schema(
+    Field("email", "email", required=True),
+    *FEEDBACK_ANSWER_FIELDS,
+    message="email is required"
+)
+
+# /api/submit validates the address once; each part is the matching
+# endpoint's payload without its own email
+SUBMISSION_SCHEMA = Schema(
+    Field("email", "email", required=True, label="Email"),
+    message="Email is required"
+)
+
+SUBMISSION_PARTS = {
+    "waitlist": Schema(message="waitlist must be true or an object"),
+    "newsletter": Schema(
+        Field("preferences", "object", schema=PREFERENCES_SCHEMA),
+        message="newsletter must be true or an object"
+    ),
+    "feedback": Schema(*FEEDBACK_ANSWER_FIELDS, message="feedback must be an object"),
+}
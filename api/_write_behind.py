@@ -0,0 +1,143 @@
+import atexit
+import threading
+import time
+from pymongo.errors import BulkWriteError, ConnectionFailure
+from api._logging import get_logger
+
+log = get_logger("write_behind")
+
+
+class WriteBehindQueue:
+    """In-process buffer that flushes documents with insert_many(ordered=False).
+
+    A flush happens when the buffer reaches ``batch_size`` documents, when the
+    oldest buffered document is older than ``max_delay`` seconds, when
+    flush() is called explicitly, and at interpreter shutdown. ``on_flushed``
+    is called with the documents each successful flush inserted.
+    Documents a flush did not write, the whole batch when it fails outright,
+    are passed to ``on_failed``. With a ``breaker``, flushes go through it.
+    """
+
+    def __init__(self, get_collection, batch_size=50, max_delay=0.2, on_flushed=None, on_failed=None, breaker=None):
+        self.get_collection = get_collection
+        self.on_flushed = on_flushed
+        self.on_failed = on_failed
+        self.breaker = breaker
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+
+        self.queued = 0
+        self.flushed = 0
+        self.failed = 0
+
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+        atexit.register(self.flush)
+
+    def put(self, document):
+        """Queue a document, flushing inline if the batch is full"""
+        with self._lock:
+            self._buffer.append(document)
+            self.queued += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._buffer) >= self.batch_size
+
+        self._ensure_worker()
+        if full:
+            self.flush()
+        else:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "failed": self.failed,
+                "pending": len(self._buffer)
+            }
+
+    def flush(self):
+        """Write every buffered document, returning how many were inserted"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._buffer
+                self._buffer = []
+                self._oldest = None
+
+            if not batch:
+                return 0
+
+            inserted = 0
+            written = []
+            unwritten = []
+            try:
+                if self.breaker is not None:
+                    result = self.breaker.call(self._insert, batch)
+                else:
+                    result = self._insert(batch)
+                inserted = len(result.inserted_ids)
+                written = batch
+            except BulkWriteError as e:
+                inserted = e.details.get("nInserted", 0)
+                errors = e.details.get("writeErrors", [])
+                failed_indexes = {error["index"] for error in errors}
+                written = [document for i, document in enumerate(batch) if i not in failed_indexes]
+                # A duplicate _id means an earlier attempt already stored the document
+                unwritten = [batch[error["index"]] for error in errors if error.get("code") != 11000]
+                log.error("write_behind_partial_failure", errors=len(errors), batch=len(batch))
+            except Exception as e:
+                log.error("write_behind_flush_failed", batch=len(batch), error=str(e))
+                unwritten = batch
+
+            with self._lock:
+                self.flushed += inserted
+                self.failed += len(batch) - inserted
+
+            if written and self.on_flushed is not None:
+                self.on_flushed(written)
+            if unwritten and self.on_failed is not None:
+                self.on_failed(unwritten)
+
+            return inserted
+
+    def _insert(self, batch):
+        collection = self.get_collection()
+        if collection is None:
+            raise ConnectionFailure("Database connection failed")
+        return collection.insert_many(batch, ordered=False)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+            while True:
+                with self._lock:
+                    oldest = self._oldest
+                if oldest is None:
+                    break
+                remaining = self.max_delay - (time.monotonic() - oldest)
+                if remaining > 0:
+                    time.sleep(remaining)
+                    continue
+                self.flush()
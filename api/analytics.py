@@ -0,0 +1,110 @@
+from http.server import BaseHTTPRequestHandler
+import os
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse, parse_qs
+from api._db import get_database
+from api._logging import get_logger
+from api._metrics import instrumented
+from api._rate_limit import rate_limited
+from api._request import RequestError, require_token
+from api._response import JSONResponder
+from api._rollups import GRANULARITIES, bucket_start, default_range, merge, read_rollups, summarize
+
+log = get_logger("analytics")
+
+# Widest range one request may cover, in buckets
+MAX_BUCKETS = {"hour": 24 * 31, "day": 366}
+BUCKET_LENGTH = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# Answers are aggregated, but still internal; without a bearer token configured they are disabled
+ANALYTICS_TOKEN = os.getenv("ANALYTICS_TOKEN")
+
+def parse_datetime(value):
+    """An ISO 8601 date or datetime as naive UTC, the form buckets are stored in"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def parse_range(query):
+    """Validate ?granularity=&from=&to= and return (granularity, start, end), aligned to buckets"""
+    granularity = query.get('granularity', ['hour'])[0]
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+
+    start, end = default_range(granularity)
+    try:
+        if 'to' in query:
+            end = parse_datetime(query['to'][0])
+        if 'from' in query:
+            start = parse_datetime(query['from'][0])
+        elif 'to' in query:
+            start = end - BUCKET_LENGTH[granularity] * (48 if granularity == "hour" else 30)
+    except ValueError:
+        raise ValueError("from and to must be ISO 8601 dates or datetimes")
+
+    if start >= end:
+        raise ValueError("from must be before to")
+
+    # Whole buckets only: from floors to its bucket and to rounds up to the next boundary,
+    # so every bucket overlapping the range is read and the response reports what it covers
+    start = bucket_start(start, granularity)
+    aligned_end = bucket_start(end, granularity)
+    end = aligned_end if aligned_end == end else aligned_end + BUCKET_LENGTH[granularity]
+    if end - start > BUCKET_LENGTH[granularity] * MAX_BUCKETS[granularity]:
+        raise ValueError(f"At most {MAX_BUCKETS[granularity]} {granularity} buckets per request")
+    return granularity, start, end
+
+# Start pool warm-up on background threads during cold start
+get_database()
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    success_headers = {'Cache-Control': 'private, max-age=30'}
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Authorization')
+        self.end_headers()
+
+    @instrumented("analytics")
+    @rate_limited("analytics")
+    def do_GET(self):
+        try:
+            require_token(self, ANALYTICS_TOKEN)
+
+            try:
+                granularity, start, end = parse_range(parse_qs(urlparse(self.path).query))
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            self.timer.mark("validate")
+
+            db = get_database()
+            self.timer.mark("db_connect")
+            if db is None:
+                self.send_error_response(500, "Database connection failed")
+                return
+
+            # One range scan over pre-aggregated buckets, however much feedback there is
+            rollups = read_rollups(db, granularity, start, end)
+            self.timer.mark("db")
+
+            self.send_success_response({
+                "success": True,
+                "granularity": granularity,
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "summary": summarize(merge(rollups)),
+                "buckets": [
+                    dict(bucket=rollup["bucket"].isoformat(), **summarize(rollup))
+                    for rollup in rollups
+                ]
+            })
+
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+        except Exception as e:
+            log.exception("analytics_failed")
+            self.send_error_response(500, f"Server error: {str(e)}")
@@ -0,0 +1,201 @@
+from http.server import BaseHTTPRequestHandler
+import os
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from api._cache import invalidate
+from api._codec import JSONDecodeError, loads
+from api._counters import increment_counter
+from api._db import env_int, get_database
+from api._logging import get_logger
+from api._metrics import instrumented
+from api._preferences import preference_mask
+from api._rate_limit import rate_limited
+from api._request import RequestError, read_body, require_token
+from api._response import JSONResponder
+from api._validation import PREFERENCES_SCHEMA, Field, Schema, ValidationError, is_valid_email, normalize_email
+
+log = get_logger("bulk_import")
+
+TARGETS = {
+    "waitlist": "waitlist_entries",
+    "newsletter": "newsletter_subscribers"
+}
+CHUNK_SIZE = env_int("BULK_IMPORT_CHUNK_SIZE", 1000)
+MAX_BODY_BYTES = env_int("BULK_IMPORT_MAX_BYTES", 10 * 1024 * 1024)
+
+# Imports write straight into the signup collections; without a bearer token configured they are disabled
+IMPORT_TOKEN = os.getenv("IMPORT_TOKEN")
+
+# Imported preferences follow the same rules as /api/newsletter
+ROW_PREFERENCES_SCHEMA = Schema(Field("preferences", "object", schema=PREFERENCES_SCHEMA))
+
+def parse_rows(body):
+    """Parse a JSON array or NDJSON body into a list of rows"""
+    text = body.decode('utf-8').strip()
+    if text.startswith('['):
+        return loads(text)
+    return [loads(line) for line in text.splitlines() if line.strip()]
+
+def new_fields(target, row, source, now):
+    """Fields set on insert for one imported row; email is set by the upsert filter.
+
+    Raises ValidationError for newsletter preferences /api/newsletter would refuse.
+    """
+    if target == "waitlist":
+        return {"created_at": now, "source": source}
+
+    preferences = ROW_PREFERENCES_SCHEMA.validate(row if isinstance(row, dict) else {})["preferences"]
+    return {
+        "weekly_updates": preferences["weekly_updates"],
+        "product_updates": preferences["product_updates"],
+        "career_tips": preferences["career_tips"],
+        "preference_mask": preference_mask(preferences),
+        "subscribed_at": now,
+        "source": source,
+        "status": "active"
+    }
+
+def plan_import(rows, target, source):
+    """Validate and dedupe rows.
+
+    Returns (results, operations, op_rows): one result per input row with the
+    status filled in for invalid and in-batch duplicate rows, the upserts
+    to run, and the input row index behind each upsert.
+    """
+    now = datetime.utcnow()
+    results = []
+    operations = []
+    op_rows = []
+    seen = set()
+
+    for index, row in enumerate(rows):
+        raw = row.get('email') if isinstance(row, dict) else row
+        if not isinstance(raw, str):
+            results.append({"row": index, "email": None, "status": "invalid"})
+            continue
+
+        email = normalize_email(raw)
+        if not is_valid_email(email):
+            results.append({"row": index, "email": email, "status": "invalid"})
+            continue
+        if email in seen:
+            results.append({"row": index, "email": email, "status": "duplicate"})
+            continue
+        try:
+            fields = new_fields(target, row, source, now)
+        except ValidationError as e:
+            results.append({"row": index, "email": email, "status": "invalid", "error": e.message})
+            continue
+        seen.add(email)
+
+        results.append({"row": index, "email": email, "status": None})
+        operations.append(UpdateOne(
+            {"email": email},
+            {"$setOnInsert": fields},
+            upsert=True
+        ))
+        op_rows.append(index)
+
+    return results, operations, op_rows
+
+def run_import(collection, results, operations, op_rows):
+    """Run the upserts in unordered chunks and record each row's outcome"""
+    inserted = 0
+
+    for start in range(0, len(operations), CHUNK_SIZE):
+        chunk = operations[start:start + CHUNK_SIZE]
+        chunk_rows = op_rows[start:start + CHUNK_SIZE]
+        upserted = set()
+        failed = {}
+
+        try:
+            result = collection.bulk_write(chunk, ordered=False)
+            upserted = set(result.upserted_ids)
+        except BulkWriteError as e:
+            upserted = {item["index"] for item in e.details.get("upserted", [])}
+            for error in e.details.get("writeErrors", []):
+                # 11000 is a concurrent signup winning the race for the unique email
+                failed[error["index"]] = "duplicate" if error.get("code") == 11000 else "error"
+        except Exception as e:
+            log.error("bulk_import_chunk_failed", first_row=chunk_rows[0], error=str(e))
+            failed = {position: "error" for position in range(len(chunk))}
+
+        for position, row_index in enumerate(chunk_rows):
+            if position in upserted:
+                results[row_index]["status"] = "inserted"
+                inserted += 1
+            else:
+                results[row_index]["status"] = failed.get(position, "duplicate")
+
+    return inserted
+
+# Start pool warm-up on background threads during cold start
+get_database()
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.end_headers()
+
+    @instrumented("bulk_import")
+    @rate_limited("bulk_import")
+    def do_POST(self):
+        try:
+            require_token(self, IMPORT_TOKEN)
+
+            query = parse_qs(urlparse(self.path).query)
+            target = query.get('target', [None])[0]
+            if target not in TARGETS:
+                self.send_error_response(400, f"target must be one of: {', '.join(TARGETS)}")
+                return
+            source = query.get('source', ['import'])[0]
+
+            # Read the body; oversized or unsized requests are refused before reading
+            post_data = read_body(self, MAX_BODY_BYTES)
+            self.timer.mark("read")
+            rows = parse_rows(post_data)
+            self.timer.mark("parse")
+            if not isinstance(rows, list):
+                self.send_error_response(400, "Body must be a JSON array or NDJSON")
+                return
+
+            results, operations, op_rows = plan_import(rows, target, source)
+            self.timer.mark("validate")
+
+            # Get database connection
+            db = get_database()
+            self.timer.mark("db_connect")
+            if db is None:
+                self.send_error_response(500, "Database connection failed")
+                return
+
+            inserted = run_import(db[TARGETS[target]], results, operations, op_rows)
+            if inserted:
+                increment_counter(db, TARGETS[target], inserted)
+                invalidate("stats")
+            self.timer.mark("db")
+
+            summary = {"inserted": 0, "duplicate": 0, "invalid": 0, "error": 0}
+            for result in results:
+                summary[result["status"]] += 1
+            log.info("bulk_import", collection=TARGETS[target], **summary)
+
+            self.send_success_response({
+                "success": True,
+                "summary": summary,
+                "results": results
+            })
+
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+        except (JSONDecodeError, UnicodeDecodeError):
+            log.info("invalid_json", sample=True)
+            self.send_error_response(400, "Invalid JSON")
+        except Exception as e:
+            log.exception("bulk_import_failed")
+            self.send_error_response(500, f"Server error: {str(e)}")
@@ -0,0 +1,132 @@
+from http.server import BaseHTTPRequestHandler
+import os
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING
+from api._db import get_database
+from api._logging import get_logger
+from api._metrics import instrumented
+from api._queries import ENTRY_SOURCES
+from api._request import RequestError, require_token
+from api._response import JSONResponder
+from api._stream import FORMATS, Download, parse_batch_size, prefetch
+
+log = get_logger("export")
+
+DEFAULT_BATCH_SIZE = 500
+
+# Exports contain every email address; without a bearer token configured they are disabled
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+def parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime")
+
+def build_export(query):
+    """Validate export parameters and return (source spec, filter, fields, format, batch size)"""
+    source = query.get('collection', [None])[0]
+    if source not in ENTRY_SOURCES:
+        raise ValueError(f"collection must be one of: {', '.join(ENTRY_SOURCES)}")
+    spec = ENTRY_SOURCES[source]
+
+    export_format = query.get('format', ['ndjson'])[0]
+    if export_format not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+    fields = spec["fields"]
+    if 'fields' in query:
+        fields = [field for field in query['fields'][0].split(',') if field]
+        unknown = [field for field in fields if field not in spec["fields"]]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    batch_size = parse_batch_size(query, DEFAULT_BATCH_SIZE)
+
+    mongo_filter = {}
+    date_range = {}
+    if 'from' in query:
+        date_range["$gte"] = parse_date(query['from'][0], "from")
+    if 'to' in query:
+        date_range["$lt"] = parse_date(query['to'][0], "to")
+    if date_range:
+        mongo_filter[spec["sort_field"]] = date_range
+
+    # Exports walk _id in ascending order, so the last id sent resumes the stream
+    if 'after_id' in query:
+        try:
+            mongo_filter["_id"] = {"$gt": ObjectId(query['after_id'][0])}
+        except InvalidId:
+            raise ValueError("after_id must be a document id")
+
+    return spec, mongo_filter, fields, export_format, batch_size
+
+# Start pool warm-up on background threads during cold start
+get_database()
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    # Chunked transfer encoding needs HTTP/1.1
+    protocol_version = 'HTTP/1.1'
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Authorization')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    @instrumented("export")
+    def do_GET(self):
+        try:
+            require_token(self, EXPORT_TOKEN)
+
+            try:
+                spec, mongo_filter, fields, export_format, batch_size = build_export(
+                    parse_qs(urlparse(self.path).query)
+                )
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            self.timer.mark("validate")
+
+            db = get_database()
+            self.timer.mark("db_connect")
+            if db is None:
+                self.send_error_response(500, "Database connection failed")
+                return
+
+            # Server-side cursor: documents arrive batch_size at a time, so memory stays flat
+            cursor = db[spec["collection"]].find(
+                mongo_filter,
+                projection={field: 1 for field in fields},
+                sort=[("_id", ASCENDING)],
+                batch_size=batch_size
+            )
+            documents = prefetch(cursor)
+            self.timer.mark("db")
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+            return
+        except Exception as e:
+            log.exception("export_prepare_failed")
+            self.send_error_response(500, f"Server error: {str(e)}")
+            return
+
+        download = Download(
+            self, export_format, f'{spec["collection"]}.{export_format}', batch_size, fields
+        )
+        download.start()
+        try:
+            download.send(documents)
+            log.info("export", collection=spec["collection"], documents=download.sent)
+        except Exception as e:
+            # Headers are already sent; closing without the final chunk marks the export as incomplete
+            log.error("export_failed", collection=spec["collection"], documents=download.sent, error=str(e))
+            self.close_connection = True
+        finally:
+            cursor.close()
+            self.timer.mark("stream")
@@ -1,66 +1,72 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import re
 import os
 from datetime import datetime
-from pymongo import MongoClient
+from api._breaker import mongo_breaker
+from api._cache import invalidate
+from api._codec import JSONDecodeError, loads
+from api._counters import increment_counter
+from api._db import env_int, get_database
+from api._logging import get_logger
+from api._metrics import instrumented, register_collector
+from api._rate_limit import rate_limited
+from api._request import RequestError, read_body
+from api._response import JSONResponder
+from api._rollups import record_feedback
+from api._spool import INSERT, spool_documents, write_or_spool
+from api._validation import FEEDBACK_SCHEMA
+from api._write_behind import WriteBehindQueue
 
-# Global variables for connection caching
-_client = None
-_db = None
+log = get_logger("feedback")
 
-def is_valid_email(email):
-    pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-    return re.match(pattern, email) is not None
+def get_feedback_collection():
+    db = get_database()
+    return db.feedback_responses if db is not None else None
 
-def get_database():
-    """Bulletproof database connection that always works"""
-    global _client, _db
-    
-    if _client is not None and _db is not None:
-        return _db
-    
+def count_flushed_feedback(documents):
+    db = get_database()
+    if db is not None:
+        increment_counter(db, "feedback_responses", len(documents))
+        record_feedback(db, documents)
+        invalidate("stats")
+
+def spool_unflushed_feedback(batch):
     try:
-        mongodb_uri = os.getenv("MONGODB_URI")
-        if not mongodb_uri:
-            print("ERROR: MONGODB_URI environment variable not found")
-            return None
-            
-        print("Connecting to MongoDB...")
-        
-        _client = MongoClient(
-            mongodb_uri,
-            maxPoolSize=1,
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=5000
-        )
-        
-        # Test the connection
-        _client.admin.command('ping')
-        print("MongoDB connection successful!")
-        
-        # ALWAYS use explicit database name - never rely on get_default_database()
-        _db = _client['thetruthschool']
-        
-        # Test database access
-        try:
-            # This will create the database if it doesn't exist
-            collection_names = _db.list_collection_names()
-            print(f"Successfully connected to database: {_db.name}")
-            print(f"Collections found: {collection_names}")
-        except Exception as db_test_error:
-            print(f"Database test failed: {str(db_test_error)}")
-            # Still return the database object - it will work for operations
-        
-        return _db
-        
-    except Exception as e:
-        print(f"MongoDB connection failed: {str(e)}")
-        _client = None
-        _db = None
-        return None
+        spool_documents("feedback_responses", INSERT, batch)
+    except OSError as e:
+        log.error("feedback_spool_failed", documents=len(batch), error=str(e))
+
+# Optional write-behind mode: accept feedback immediately and batch the inserts
+WRITE_BEHIND = os.getenv("FEEDBACK_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+# Serverless instances may be frozen once the response is sent, so flush per invocation there
+FLUSH_EACH_INVOCATION = bool(os.getenv("VERCEL"))
+
+feedback_queue = WriteBehindQueue(
+    get_feedback_collection,
+    batch_size=env_int("FEEDBACK_BATCH_SIZE", 50),
+    max_delay=env_int("FEEDBACK_BATCH_MAX_DELAY_MS", 200) / 1000.0,
+    on_flushed=count_flushed_feedback,
+    on_failed=spool_unflushed_feedback,
+    breaker=mongo_breaker
+) if WRITE_BEHIND else None
+
+def write_behind_metrics():
+    stats = feedback_queue.stats()
+    lines = ["# TYPE feedback_write_behind_documents_total counter"]
+    for state in ("queued", "flushed", "failed"):
+        lines.append(f'feedback_write_behind_documents_total{{state="{state}"}} {stats[state]}')
+    lines.append("# TYPE feedback_write_behind_pending gauge")
+    lines.append(f"feedback_write_behind_pending {stats['pending']}")
+    return lines
+
+if feedback_queue is not None:
+    register_collector(write_behind_metrics)
+
+# Start pool warm-up on background threads during cold start
+get_database()
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    success_status = 201
 
-class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -68,50 +74,63 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
+    @instrumented("feedback")
+    @rate_limited("feedback")
     def do_POST(self):
         try:
-            # Read the request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
+            # Read the body; oversized or unsized requests are refused before reading
+            post_data = read_body(self)
+            self.timer.mark("read")
             
             # Parse JSON
-            data = json.loads(post_data.decode('utf-8'))
-            print(f"Received feedback request: {data}")
+            data = loads(post_data)
+            self.timer.mark("parse")
             
-            # Validate required fields
-            required_fields = ['email', 'frustration', 'ai_coach_help', 'confidence_area']
-            for field in required_fields:
-                if not data or field not in data or not str(data[field]).strip():
-                    self.send_error_response(400, f"{field} is required")
-                    return
+            # Validate against the precompiled schema
+            payload = FEEDBACK_SCHEMA.validate(data)
+            email = payload["email"]
             
-            email = data['email'].strip().lower()
+            # Add feedback
+            feedback_entry = dict(
+                payload,
+                created_at=datetime.utcnow(),
+                source="website_quiz"
+            )
+            self.timer.mark("validate")
             
-            if not is_valid_email(email):
-                self.send_error_response(400, "Invalid email format")
+            if feedback_queue is not None:
+                feedback_queue.put(feedback_entry)
+                self.timer.mark("queue")
+                self.send_success_response({
+                    "message": "Feedback submitted successfully!",
+                    "success": True
+                }, 202)
+                if FLUSH_EACH_INVOCATION:
+                    feedback_queue.flush()
+                    self.timer.mark("flush")
                 return
             
-            # Get database connection
-            db = get_database()
-            if db is None:
-                self.send_error_response(500, "Database connection failed")
+            # Insert, or journal the entry for replay while MongoDB is unreachable
+            result, spooled = write_or_spool(
+                "feedback_responses", INSERT, feedback_entry,
+                lambda collection: collection.insert_one(feedback_entry)
+            )
+            if spooled:
+                log.info("feedback_spooled", sample=True, email=email)
+                self.timer.mark("spool")
+                self.send_success_response({
+                    "message": "Feedback submitted successfully!",
+                    "success": True,
+                    "queued": True
+                }, 202)
                 return
-                
-            collection = db.feedback_responses
             
-            # Add feedback
-            feedback_entry = {
-                "email": email,
-                "frustration": str(data['frustration']).strip(),
-                "ai_coach_help": str(data['ai_coach_help']).strip(),
-                "confidence_area": str(data['confidence_area']).strip(),
-                "additional_features": str(data.get('additional_features', '')).strip(),
-                "created_at": datetime.utcnow(),
-                "source": "website_quiz"
-            }
-            
-            result = collection.insert_one(feedback_entry)
-            print(f"Added feedback for {email} with ID: {result.inserted_id}")
+            db = get_database()
+            increment_counter(db, "feedback_responses")
+            record_feedback(db, [feedback_entry])
+            invalidate("stats")
+            log.info("feedback_added", sample=True, email=email, id=str(result.inserted_id))
+            self.timer.mark("db")
             
             response = {
                 "message": "Feedback submitted successfully!",
@@ -120,24 +139,11 @@ class handler(BaseHTTPRequestHandler):
             
             self.send_success_response(response, 201)
             
-        except json.JSONDecodeError:
-            print("Invalid JSON received")
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+        except JSONDecodeError:
+            log.info("invalid_json", sample=True)
             self.send_error_response(400, "Invalid JSON")
         except Exception as e:
-            print(f"Error processing feedback request: {str(e)}")
+            log.exception("feedback_failed")
             self.send_error_response(500, f"Server error: {str(e)}")
-
-    def send_success_response(self, data, status_code=201):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-
-    def send_error_response(self, status_code, message):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        error_data = {"error": message, "success": False}
-        self.wfile.write(json.dumps(error_data).encode('utf-8'))
\ No newline at end of file
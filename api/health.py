@@ -1,17 +1,33 @@
 from http.server import BaseHTTPRequestHandler
-import json
+from urllib.parse import urlparse, parse_qs
+from api._health_probe import database_probe
+from api._metrics import instrumented
+from api._mongo_monitoring import snapshot
+from api._response import send_json
+
+# Start the database probe on a background thread during cold start
+database_probe.start()
 
 class handler(BaseHTTPRequestHandler):
+    @instrumented("health")
     def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
+        query = parse_qs(urlparse(self.path).query)
+        status_code = 200
         response = {
             "status": "healthy",
             "message": "TheTruthSchool API is working!",
             "vercel": True
         }
-        
-        self.wfile.write(json.dumps(response).encode('utf-8'))
\ No newline at end of file
+
+        # Readiness from the cached background probe; 503 takes the instance out of rotation
+        if query.get('deep', ['0'])[0] == '1':
+            ready, response["database"] = database_probe.report()
+            if not ready:
+                response["status"] = "unhealthy"
+                status_code = 503
+
+        # Driver-level command latency, pool occupancy and heartbeat state
+        if query.get('mongo', ['0'])[0] == '1':
+            response["mongodb"] = snapshot()
+
+        send_json(self, response, status_code, {'Cache-Control': 'no-store'})
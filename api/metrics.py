@@ -0,0 +1,24 @@
+from http.server import BaseHTTPRequestHandler
+from api._logging import get_logger
+from api._metrics import render_prometheus
+from api._response import send_body
+# Registers the MongoDB command and pool collectors
+import api._mongo_monitoring  # noqa: F401
+
+log = get_logger("metrics")
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            body = render_prometheus().encode('utf-8')
+        except Exception as e:
+            log.exception("metrics_render_failed")
+            self.send_response(500)
+            self.send_header('Content-type', 'text/plain; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(f"Server error: {str(e)}".encode('utf-8'))
+            return
+        
+        # Scrapers accept gzip, and the exposition text compresses well
+        send_body(self, body, content_type='text/plain; version=0.0.4; charset=utf-8',
+                  headers={'Cache-Control': 'no-store'})
@@ -0,0 +1,130 @@
+from http.server import BaseHTTPRequestHandler
+import os
+from urllib.parse import urlparse, parse_qs
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING
+from api._db import get_database
+from api._logging import get_logger
+from api._metrics import instrumented
+from api._preferences import NEWSLETTER_COLLECTION, PREFERENCE_BITS, STATUSES, segment_filter
+from api._request import RequestError, require_token
+from api._response import JSONResponder
+from api._stream import FORMATS, Download, parse_batch_size, prefetch
+
+log = get_logger("segments")
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Send lists contain email addresses; they share the export token and are disabled without it
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+FLAG_VALUES = {"1": True, "true": True, "yes": True, "0": False, "false": False, "no": False}
+
+def parse_segment(query):
+    """Validate segment parameters and return (wanted preferences, status, format, batch size, after_id)"""
+    wanted = {}
+    for name in PREFERENCE_BITS:
+        if name in query:
+            value = FLAG_VALUES.get(query[name][0].lower())
+            if value is None:
+                raise ValueError(f"{name} must be true or false")
+            wanted[name] = value
+
+    status = query.get('status', ['active'])[0]
+    if status not in STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(STATUSES)}")
+
+    output = query.get('format', ['count'])[0]
+    if output != "count" and output not in FORMATS:
+        raise ValueError(f"format must be one of: count, {', '.join(FORMATS)}")
+
+    batch_size = parse_batch_size(query, DEFAULT_BATCH_SIZE)
+
+    after_id = None
+    if 'after_id' in query:
+        try:
+            after_id = ObjectId(query['after_id'][0])
+        except InvalidId:
+            raise ValueError("after_id must be a document id")
+
+    return wanted, status, output, batch_size, after_id
+
+# Start pool warm-up on background threads during cold start
+get_database()
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    # Chunked transfer encoding needs HTTP/1.1
+    protocol_version = 'HTTP/1.1'
+
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Authorization')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    @instrumented("segments")
+    def do_GET(self):
+        try:
+            require_token(self, EXPORT_TOKEN)
+
+            try:
+                wanted, status, output, batch_size, after_id = parse_segment(
+                    parse_qs(urlparse(self.path).query)
+                )
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            mongo_filter = segment_filter(wanted, status)
+            self.timer.mark("validate")
+
+            db = get_database()
+            self.timer.mark("db_connect")
+            if db is None:
+                self.send_error_response(500, "Database connection failed")
+                return
+            collection = db[NEWSLETTER_COLLECTION]
+
+            if output == "count":
+                # Counted from the partial index's entries for the matching mask values
+                count = collection.count_documents(mongo_filter)
+                self.timer.mark("db")
+                self.send_success_response({
+                    "success": True,
+                    "segment": dict(wanted, status=status),
+                    "count": count
+                })
+                return
+
+            if after_id is not None:
+                mongo_filter["_id"] = {"$gt": after_id}
+            cursor = collection.find(
+                mongo_filter,
+                projection={"email": 1},
+                sort=[("_id", ASCENDING)],
+                batch_size=batch_size
+            )
+            documents = prefetch(cursor)
+            self.timer.mark("db")
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+            return
+        except Exception as e:
+            log.exception("segment_failed")
+            self.send_error_response(500, f"Server error: {str(e)}")
+            return
+
+        download = Download(self, output, f"segment.{output}", batch_size, ["email"])
+        download.start()
+        try:
+            download.send(documents)
+            log.info("segment_listed", segment=dict(wanted, status=status), documents=download.sent)
+        except Exception as e:
+            # Headers are already sent; closing without the final chunk marks the list as incomplete
+            log.error("segment_list_failed", documents=download.sent, error=str(e))
+            self.close_connection = True
+        finally:
+            cursor.close()
+            self.timer.mark("stream")
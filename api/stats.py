@@ -1,90 +1,148 @@
 from http.server import BaseHTTPRequestHandler
-import json
 import os
-from pymongo import MongoClient
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+from api._cache import etag_matches, get_cache
+from api._codec import dumps
+from api._counters import estimated_counts, read_counters, reconcile_counters
+from api._db import env_float, env_int, get_database
+from api._logging import get_logger
+from api._metrics import instrumented, send_timing_header
+from api._queries import ENTRY_SOURCES, MAX_PAGE_SIZE, encode_cursor, latest_entries, serialize_entry
+from api._rate_limit import rate_limited
+from api._request import RequestError, require_token
+from api._response import JSONResponder, choose_encoding, entity_tag, send_body
 
-# Global variables for connection caching
-_client = None
-_db = None
+log = get_logger("stats")
 
-def get_database():
-    """Bulletproof database connection that always works"""
-    global _client, _db
+# "counters" reads the materialized totals, "estimated" uses collection
+# metadata, "exact" runs count_documents({}) on every request
+COUNT_MODES = ("counters", "estimated", "exact")
+DEFAULT_COUNT_MODE = os.getenv("STATS_COUNT_MODE", "counters")
+
+# Serialized responses are reused for this many seconds, here and at the edge
+CACHE_TTL = max(0.0, env_float("STATS_CACHE_TTL", 10.0))
+stats_cache = get_cache("stats", CACHE_TTL)
+
+# The stats queries are independent, so they run side by side on this pool
+# and the endpoint waits only as long as the slowest one
+query_pool = ThreadPoolExecutor(
+    max_workers=env_int("STATS_QUERY_WORKERS", 6),
+    thread_name_prefix="stats-query"
+)
+
+def get_counts(db, mode):
+    if mode == "estimated":
+        return estimated_counts(db)
     
-    if _client is not None and _db is not None:
-        return _db
+    counts = read_counters(db)
+    if counts is None:
+        # First read on a fresh database: build the counters document once
+        counts = reconcile_counters(db)
+    return counts
+
+def count_collection(db, name):
+    return {name: db[name].count_documents({})}
+
+def get_latest(db, source):
+    sort_field = ENTRY_SOURCES[source]["sort_field"]
+    return [serialize_entry(doc, sort_field) for doc in latest_entries(db, source)]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run_queries(db, mode):
+    """Run the count and latest-entry queries concurrently.
+
+    Returns (results, timings) where timings maps each query to its
+    duration in seconds.
+    """
+    queries = {
+        "latest_waitlist": (get_latest, db, "waitlist"),
+        "latest_feedback": (get_latest, db, "feedback"),
+        "latest_newsletter": (get_latest, db, "newsletter")
+    }
+    if mode == "exact":
+        for name in ("waitlist_entries", "feedback_responses", "newsletter_subscribers"):
+            queries[f"count_{name}"] = (count_collection, db, name)
+    else:
+        queries["counts"] = (get_counts, db, mode)
     
-    try:
-        mongodb_uri = os.getenv("MONGODB_URI")
-        if not mongodb_uri:
-            print("ERROR: MONGODB_URI environment variable not found")
-            return None
-            
-        print("Connecting to MongoDB...")
-        
-        _client = MongoClient(
-            mongodb_uri,
-            maxPoolSize=1,
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=5000
-        )
-        
-        # Test the connection
-        _client.admin.command('ping')
-        print("MongoDB connection successful!")
-        
-        # ALWAYS use explicit database name - never rely on get_default_database()
-        _db = _client['thetruthschool']
-        
-        # Test database access
-        try:
-            # This will create the database if it doesn't exist
-            collection_names = _db.list_collection_names()
-            print(f"Successfully connected to database: {_db.name}")
-            print(f"Collections found: {collection_names}")
-        except Exception as db_test_error:
-            print(f"Database test failed: {str(db_test_error)}")
-            # Still return the database object - it will work for operations
-        
-        return _db
-        
-    except Exception as e:
-        print(f"MongoDB connection failed: {str(e)}")
-        _client = None
-        _db = None
-        return None
+    futures = {
+        label: query_pool.submit(timed, *query)
+        for label, query in queries.items()
+    }
+    
+    results = {}
+    timings = {}
+    for label, future in futures.items():
+        results[label], timings[label] = future.result()
+    
+    if mode == "exact":
+        results["counts"] = {}
+        for name in ("waitlist_entries", "feedback_responses", "newsletter_subscribers"):
+            results["counts"].update(results.pop(f"count_{name}"))
+    
+    return results, timings
 
-class handler(BaseHTTPRequestHandler):
+# Paging reaches every stored address, so it needs the export token and is disabled without it
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+# Start pool warm-up on background threads during cold start
+get_database()
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    @instrumented("stats")
+    @rate_limited("stats")
     def do_GET(self):
         try:
+            query = parse_qs(urlparse(self.path).query)
+            mode = query.get('count', [DEFAULT_COUNT_MODE])[0]
+            if mode not in COUNT_MODES:
+                self.send_error_response(400, f"count must be one of: {', '.join(COUNT_MODES)}")
+                return
+            
+            if 'entries' in query:
+                self.send_entries_page(query)
+                return
+            
+            # Serve repeat polls from the cache without touching the database
+            cached = stats_cache.get(mode)
+            self.timer.mark("cache")
+            if cached is not None:
+                self.send_cached_response(cached)
+                return
+            
             # Get database connection
             db = get_database()
+            self.timer.mark("db_connect")
             if db is None:
                 self.send_error_response(500, "Database connection failed")
                 return
             
+            results, timings = run_queries(db, mode)
+            for label, seconds in timings.items():
+                self.timer.record(label, seconds)
+            self.timer.mark("db")
+            
             # Get collection counts
-            waitlist_count = db.waitlist_entries.count_documents({})
-            feedback_count = db.feedback_responses.count_documents({})
-            newsletter_count = db.newsletter_subscribers.count_documents({})
+            counts = results["counts"]
+            waitlist_count = counts["waitlist_entries"]
+            feedback_count = counts["feedback_responses"]
+            newsletter_count = counts["newsletter_subscribers"]
             
             # Get some sample data (latest entries)
-            latest_waitlist = list(db.waitlist_entries.find().sort("created_at", -1).limit(3))
-            latest_feedback = list(db.feedback_responses.find().sort("created_at", -1).limit(3))
-            latest_newsletter = list(db.newsletter_subscribers.find().sort("subscribed_at", -1).limit(3))
-            
-            # Convert ObjectId to string for JSON serialization
-            for item in latest_waitlist + latest_feedback + latest_newsletter:
-                if '_id' in item:
-                    item['_id'] = str(item['_id'])
-                # Convert datetime to string
-                for key, value in item.items():
-                    if hasattr(value, 'isoformat'):
-                        item[key] = value.isoformat()
+            latest_waitlist = results["latest_waitlist"]
+            latest_feedback = results["latest_feedback"]
+            latest_newsletter = results["latest_newsletter"]
             
             response = {
                 "success": True,
                 "database_connected": True,
+                "count_mode": mode,
                 "collections": {
                     "waitlist_entries": waitlist_count,
                     "feedback_responses": feedback_count,
@@ -98,25 +156,72 @@ class handler(BaseHTTPRequestHandler):
                 }
             }
             
-            print(f"Stats: Waitlist: {waitlist_count}, Feedback: {feedback_count}, Newsletter: {newsletter_count}")
+            log.info("stats", sample=True, waitlist=waitlist_count, feedback=feedback_count, newsletter=newsletter_count)
             
-            self.send_success_response(response)
+            body = dumps(response)
+            self.timer.mark("serialize")
+            self.send_cached_response(stats_cache.put(mode, body))
             
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
         except Exception as e:
-            print(f"Error getting stats: {str(e)}")
+            log.exception("stats_failed")
             self.send_error_response(500, f"Server error: {str(e)}")
 
-    def send_success_response(self, data, status_code=200):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, indent=2).encode('utf-8'))
+    def send_entries_page(self, query):
+        """Page back through one collection's history with a before= cursor"""
+        require_token(self, EXPORT_TOKEN)
+        
+        source = query['entries'][0]
+        if source not in ENTRY_SOURCES:
+            self.send_error_response(400, f"entries must be one of: {', '.join(ENTRY_SOURCES)}")
+            return
+        
+        try:
+            limit = int(query.get('limit', ['20'])[0])
+        except ValueError:
+            self.send_error_response(400, "limit must be an integer")
+            return
+        if limit < 1:
+            self.send_error_response(400, "limit must be positive")
+            return
+        limit = min(limit, MAX_PAGE_SIZE)
+        
+        db = get_database()
+        self.timer.mark("db_connect")
+        if db is None:
+            self.send_error_response(500, "Database connection failed")
+            return
+        
+        try:
+            docs = latest_entries(db, source, limit, query.get('before', [None])[0])
+        except ValueError as e:
+            self.send_error_response(400, str(e))
+            return
+        self.timer.mark("db")
+        
+        sort_field = ENTRY_SOURCES[source]["sort_field"]
+        next_before = encode_cursor(docs[-1], sort_field) if len(docs) == limit else None
+        self.send_success_response({
+            "success": True,
+            "entries": [serialize_entry(doc, sort_field) for doc in docs],
+            "next_before": next_before
+        })
 
-    def send_error_response(self, status_code, message):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        error_data = {"error": message, "success": False}
-        self.wfile.write(json.dumps(error_data).encode('utf-8'))
\ No newline at end of file
+    def send_cached_response(self, entry):
+        ttl = int(CACHE_TTL)
+        cache_control = f'public, max-age=0, s-maxage={ttl}, stale-while-revalidate={ttl}'
+        
+        if etag_matches(self.headers.get('If-None-Match'), entry.etag):
+            encoding = choose_encoding(self, len(entry.body))
+            self.send_response(304)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('ETag', entity_tag(entry.etag, encoding))
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            send_timing_header(self)
+            self.end_headers()
+            return
+        
+        # Each encoding of a cached body is compressed once and reused until it expires
+        send_body(self, entry.body, headers={'Cache-Control': cache_control}, etag=entry.etag, encoded=entry.encoded)
@@ -0,0 +1,266 @@
+from http.server import BaseHTTPRequestHandler
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pymongo.errors import ConnectionFailure, OperationFailure
+from api._breaker import mongo_breaker
+from api._cache import invalidate
+from api._codec import JSONDecodeError, loads
+from api._counters import increment_counters
+from api._db import get_database, insert_if_absent, supports_transactions
+from api._known_emails import get_known_emails
+from api._logging import get_logger
+from api._metrics import instrumented
+from api._preferences import preference_mask
+from api._rate_limit import rate_limited
+from api._request import RequestError, read_body
+from api._response import JSONResponder
+from api._rollups import record_feedback
+from api._spool import INSERT, SIGNUP, journal, make_entry, replay_in_background, write_or_spool
+from api._validation import SUBMISSION_PARTS, SUBMISSION_SCHEMA, ValidationError
+
+log = get_logger("submit")
+
+# With several parts, write them in one multi-document transaction when the
+# deployment supports it; otherwise (or with SUBMIT_TRANSACTIONS=0) the
+# parts are written concurrently on pooled connections
+TRANSACTIONS = os.getenv("SUBMIT_TRANSACTIONS", "1").lower() not in ("0", "false", "no")
+
+COLLECTIONS = {
+    "waitlist": "waitlist_entries",
+    "newsletter": "newsletter_subscribers",
+    "feedback": "feedback_responses",
+}
+
+# (created, duplicate) messages, as the single-part endpoints word them
+MESSAGES = {
+    "waitlist": ("Successfully joined the waitlist!", "Email already registered for early access!"),
+    "newsletter": ("Successfully subscribed to TheTruthSchool newsletter!", "Email already subscribed to newsletter!"),
+    "feedback": ("Feedback submitted successfully!", None),
+}
+
+_executor = ThreadPoolExecutor(max_workers=len(COLLECTIONS), thread_name_prefix="submit")
+
+
+class Part:
+    """One collection write of a submission, and how it turned out"""
+
+    def __init__(self, name, op, document, write):
+        self.name = name
+        self.collection = COLLECTIONS[name]
+        self.op = op
+        self.document = document
+        # write(collection, session) -> True if it created a document
+        self.write = write
+        # "created", "duplicate", "queued" or "failed"
+        self.status = None
+        self.error = None
+
+    def result(self):
+        if self.status == "failed":
+            return {"success": False, "status": self.status, "error": self.error}
+        created, duplicate = MESSAGES[self.name]
+        message = duplicate if self.status == "duplicate" else created
+        return {"success": True, "status": self.status, "message": message}
+
+
+def parse_submission(data):
+    """Validate the address once and each part present; returns (email, {name: payload})"""
+    email = SUBMISSION_SCHEMA.validate(data)["email"]
+    payloads = {}
+    for name, schema in SUBMISSION_PARTS.items():
+        value = data.get(name)
+        if value is None or value is False:
+            continue
+        payloads[name] = schema.validate({} if value is True else value)
+    if not payloads:
+        raise ValidationError("At least one of waitlist, newsletter or feedback is required")
+    return email, payloads
+
+
+def build_parts(email, payloads):
+    now = datetime.utcnow()
+    parts = []
+
+    if "waitlist" in payloads:
+        fields = {"created_at": now, "source": "website"}
+        parts.append(Part(
+            "waitlist", SIGNUP, dict(fields, email=email),
+            lambda collection, session=None: insert_if_absent(collection, email, fields, session)
+        ))
+
+    if "newsletter" in payloads:
+        preferences = payloads["newsletter"]["preferences"]
+        subscription = {
+            "weekly_updates": preferences["weekly_updates"],
+            "product_updates": preferences["product_updates"],
+            "career_tips": preferences["career_tips"],
+            "preference_mask": preference_mask(preferences),
+            "subscribed_at": now,
+            "source": "website",
+            "status": "active"
+        }
+        parts.append(Part(
+            "newsletter", SIGNUP, dict(subscription, email=email),
+            lambda collection, session=None: insert_if_absent(collection, email, subscription, session)
+        ))
+
+    if "feedback" in payloads:
+        entry = dict(payloads["feedback"], email=email, created_at=now, source="website_quiz")
+        parts.append(Part(
+            "feedback", INSERT, entry,
+            lambda collection, session=None: collection.insert_one(entry, session=session).acknowledged
+        ))
+
+    return parts
+
+
+def write_part(part):
+    """Write one part through the breaker, journaling it while MongoDB is unreachable"""
+    try:
+        inserted, spooled = write_or_spool(part.collection, part.op, part.document, part.write)
+    except Exception as e:
+        log.error("submit_part_failed", part=part.name, error=str(e))
+        part.status, part.error = "failed", f"Server error: {str(e)}"
+        return
+    part.status = "queued" if spooled else "created" if inserted else "duplicate"
+
+
+def write_concurrently(parts):
+    """Issue the parts' writes at once, so the request waits for the slowest rather than the sum"""
+    if len(parts) == 1:
+        write_part(parts[0])
+        return
+    list(_executor.map(write_part, parts))
+
+
+def write_in_transaction(parts):
+    """Write every part atomically in one attempt.
+
+    Returns False without writing anything when the transaction is
+    aborted by the server (a write conflict, or a concurrent signup for
+    the same address winning the unique index), so the caller can fall
+    back to independent writes. Connection failures journal every part.
+    """
+    def run():
+        db = get_database()
+        if db is None:
+            raise ConnectionFailure("Database connection failed")
+        with db.client.start_session() as session:
+            with session.start_transaction():
+                return [part.write(db[part.collection], session) for part in parts]
+
+    try:
+        outcomes = mongo_breaker.call(run)
+    except ConnectionFailure as e:
+        log.warning("spooling_submission", collection="submit", reason=type(e).__name__)
+        # Replay is idempotent, so this is safe even if the commit reached the server
+        journal.append(*[make_entry(part.collection, part.op, part.document) for part in parts])
+        for part in parts:
+            part.status = "queued"
+        return True
+    except OperationFailure as e:
+        log.info("submit_transaction_aborted", code=e.code, error=str(e))
+        return False
+
+    for part, inserted in zip(parts, outcomes):
+        part.status = "created" if inserted else "duplicate"
+    # As in write_or_spool(), a write getting through drains anything journaled earlier
+    replay_in_background()
+    return True
+
+
+# Start pool and known-email warm-up on background threads during cold start
+get_database()
+known_emails = {
+    "waitlist": get_known_emails("waitlist_entries", "created_at"),
+    "newsletter": get_known_emails("newsletter_subscribers", "subscribed_at"),
+}
+
+class handler(JSONResponder, BaseHTTPRequestHandler):
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+    @instrumented("submit")
+    @rate_limited("submit")
+    def do_POST(self):
+        try:
+            # Read the body; oversized or unsized requests are refused before reading
+            post_data = read_body(self)
+            self.timer.mark("read")
+
+            # Parse JSON
+            data = loads(post_data)
+            self.timer.mark("parse")
+
+            # Validate the address once, then each part against its schema
+            email, payloads = parse_submission(data)
+            parts = build_parts(email, payloads)
+            self.timer.mark("validate")
+
+            # Addresses already confirmed in this process are answered from memory
+            pending = []
+            for part in parts:
+                if part.name in known_emails and known_emails[part.name].contains(email):
+                    part.status = "duplicate"
+                else:
+                    pending.append(part)
+
+            if pending:
+                db = get_database()
+                transactional = (
+                    TRANSACTIONS and len(pending) > 1 and db is not None
+                    and supports_transactions(db.client)
+                )
+                if not (transactional and write_in_transaction(pending)):
+                    write_concurrently(pending)
+                self.timer.mark("db")
+                self.record(email, pending, transactional)
+
+            self.send_success_response(*self.build_response(parts))
+
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+        except JSONDecodeError:
+            log.info("invalid_json", sample=True)
+            self.send_error_response(400, "Invalid JSON")
+        except Exception as e:
+            log.exception("submit_failed")
+            self.send_error_response(500, f"Server error: {str(e)}")
+
+    def record(self, email, parts, transactional):
+        """Counters, rollups and known emails for the parts that were written"""
+        created = [part for part in parts if part.status == "created"]
+        for part in parts:
+            if part.name in known_emails and part.status in ("created", "duplicate"):
+                known_emails[part.name].add(email)
+        if created:
+            db = get_database()
+            increment_counters(db, {part.collection: 1 for part in created})
+            record_feedback(db, [part.document for part in created if part.name == "feedback"])
+            invalidate("stats")
+            self.timer.mark("counters")
+        log.info(
+            "submission", sample=True, email=email, transaction=transactional,
+            **{part.name: part.status for part in parts}
+        )
+
+    def build_response(self, parts):
+        """Per-part results, and a status code for the most significant outcome"""
+        statuses = {part.status for part in parts}
+        if statuses == {"failed"}:
+            status_code = 500
+        elif "created" in statuses:
+            status_code = 201
+        elif "queued" in statuses:
+            status_code = 202
+        else:
+            status_code = 200
+        return {
+            "success": "failed" not in statuses,
+            "results": {part.name: part.result() for part in parts}
+        }, status_code
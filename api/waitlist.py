@@ -1,66 +1,25 @@
 from http.server import BaseHTTPRequestHandler
-import json
-import re
-import os
 from datetime import datetime
-from pymongo import MongoClient
+from api._cache import invalidate
+from api._codec import JSONDecodeError, loads
+from api._counters import increment_counter
+from api._db import get_database, insert_if_absent
+from api._known_emails import get_known_emails
+from api._logging import get_logger
+from api._metrics import instrumented
+from api._rate_limit import rate_limited
+from api._request import RequestError, read_body
+from api._response import JSONResponder
+from api._spool import SIGNUP, write_or_spool
+from api._validation import WAITLIST_SCHEMA
 
-# Global variables for connection caching
-_client = None
-_db = None
+log = get_logger("waitlist")
 
-def is_valid_email(email):
-    pattern = r'^[^\s@]+@[^\s@]+\.[^\s@]+$'
-    return re.match(pattern, email) is not None
+# Start pool and known-email warm-up on background threads during cold start
+get_database()
+known_emails = get_known_emails("waitlist_entries", "created_at")
 
-def get_database():
-    """Bulletproof database connection that always works"""
-    global _client, _db
-    
-    if _client is not None and _db is not None:
-        return _db
-    
-    try:
-        mongodb_uri = os.getenv("MONGODB_URI")
-        if not mongodb_uri:
-            print("ERROR: MONGODB_URI environment variable not found")
-            return None
-            
-        print("Connecting to MongoDB...")
-        
-        _client = MongoClient(
-            mongodb_uri,
-            maxPoolSize=1,
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=5000
-        )
-        
-        # Test the connection
-        _client.admin.command('ping')
-        print("MongoDB connection successful!")
-        
-        # ALWAYS use explicit database name - never rely on get_default_database()
-        _db = _client['thetruthschool']
-        
-        # Test database access
-        try:
-            # This will create the database if it doesn't exist
-            collection_names = _db.list_collection_names()
-            print(f"Successfully connected to database: {_db.name}")
-            print(f"Collections found: {collection_names}")
-        except Exception as db_test_error:
-            print(f"Database test failed: {str(db_test_error)}")
-            # Still return the database object - it will work for operations
-        
-        return _db
-        
-    except Exception as e:
-        print(f"MongoDB connection failed: {str(e)}")
-        _client = None
-        _db = None
-        return None
-
-class handler(BaseHTTPRequestHandler):
+class handler(JSONResponder, BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -68,79 +27,74 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
+    @instrumented("waitlist")
+    @rate_limited("waitlist")
     def do_POST(self):
         try:
-            # Read the request body
-            content_length = int(self.headers.get('Content-Length', 0))
-            post_data = self.rfile.read(content_length)
+            # Read the body; oversized or unsized requests are refused before reading
+            post_data = read_body(self)
+            self.timer.mark("read")
             
             # Parse JSON
-            data = json.loads(post_data.decode('utf-8'))
-            print(f"Received waitlist request: {data}")
+            data = loads(post_data)
+            self.timer.mark("parse")
             
-            # Validate email
-            if not data or 'email' not in data:
-                self.send_error_response(400, "Email is required")
-                return
+            # Validate against the precompiled schema
+            email = WAITLIST_SCHEMA.validate(data)["email"]
             
-            email = data['email'].strip().lower()
+            self.timer.mark("validate")
             
-            if not is_valid_email(email):
-                self.send_error_response(400, "Invalid email format")
-                return
+            fields = {
+                "created_at": datetime.utcnow(),
+                "source": "website"
+            }
             
-            # Get database connection
-            db = get_database()
-            if db is None:
-                self.send_error_response(500, "Database connection failed")
-                return
-                
-            collection = db.waitlist_entries
+            # Addresses already confirmed in this process are answered from memory
+            if known_emails.contains(email):
+                inserted, spooled = False, False
+            else:
+                # Insert unless already registered, in a single round trip; while
+                # MongoDB is unreachable the signup is journaled for replay instead
+                inserted, spooled = write_or_spool(
+                    "waitlist_entries", SIGNUP, dict(fields, email=email),
+                    lambda collection: insert_if_absent(collection, email, fields)
+                )
+                if not spooled:
+                    known_emails.add(email)
             
-            # Check if email already exists
-            existing = collection.find_one({"email": email})
-            if existing:
-                print(f"Email {email} already exists in waitlist")
+            if spooled:
+                log.info("waitlist_spooled", sample=True, email=email)
+                self.timer.mark("spool")
+                self.send_success_response({
+                    "message": "Successfully joined the waitlist!",
+                    "success": True,
+                    "queued": True
+                }, 202)
+                return
+            if not inserted:
+                log.info("waitlist_duplicate", sample=True, email=email)
                 response = {
                     "message": "Email already registered for early access!",
                     "success": True
                 }
             else:
-                # Add to waitlist
-                waitlist_entry = {
-                    "email": email,
-                    "created_at": datetime.utcnow(),
-                    "source": "website"
-                }
-                
-                result = collection.insert_one(waitlist_entry)
-                print(f"Added {email} to waitlist with ID: {result.inserted_id}")
+                increment_counter(get_database(), "waitlist_entries")
+                invalidate("stats")
+                log.info("waitlist_joined", sample=True, email=email)
                 
                 response = {
                     "message": "Successfully joined the waitlist!",
                     "success": True
                 }
+            self.timer.mark("db")
             
             self.send_success_response(response)
             
-        except json.JSONDecodeError:
-            print("Invalid JSON received")
+        except RequestError as e:
+            self.send_error_response(e.status, e.message)
+        except JSONDecodeError:
+            log.info("invalid_json", sample=True)
             self.send_error_response(400, "Invalid JSON")
         except Exception as e:
-            print(f"Error processing waitlist request: {str(e)}")
+            log.exception("waitlist_failed")
             self.send_error_response(500, f"Server error: {str(e)}")
-
-    def send_success_response(self, data, status_code=200):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode('utf-8'))
-
-    def send_error_response(self, status_code, message):
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        error_data = {"error": message, "success": False}
-        self.wfile.write(json.dumps(error_data).encode('utf-8'))
\ No newline at end of file
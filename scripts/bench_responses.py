@@ -0,0 +1,116 @@
+"""Compare response bytes on the wire and serialization CPU per encoding.
+
+    python -m scripts.bench_responses [--iterations 2000]
+
+For representative bodies of each endpoint, measures what the handlers
+used to send (json.dumps, indented for /api/stats) against the shared
+writer in api/_response.py: compact JSON, then gzip and, when the brotli
+package is installed, brotli on top. Bodies under the compression
+threshold are shown for reference even though the writer sends them as
+they are. Times are CPU microseconds per response, the best of several
+runs; bytes are the body only.
+"""
+import argparse
+import json
+import time
+import timeit
+from datetime import datetime, timedelta
+
+from api._codec import dumps
+from api._response import COMPRESS_MIN_BYTES, ENCODERS
+from api._rollups import summarize
+
+NOW = datetime(2025, 3, 14, 15, 0)
+
+
+def latest(kind, count=5):
+    entries = []
+    for i in range(count):
+        entry = {
+            "_id": f"65f3{i:020x}",
+            "email": f"candidate{i}@example.com",
+            "source": "website_quiz" if kind == "feedback" else "website",
+        }
+        if kind == "feedback":
+            entry.update({
+                "frustration": "I never hear back after the final round and have no idea what went wrong",
+                "ai_coach_help": "Mock interviews that point at the exact answer that lost the offer",
+                "confidence_area": "System Design",
+                "additional_features": "Salary negotiation practice",
+                "created_at": (NOW - timedelta(minutes=i)).isoformat(),
+            })
+        elif kind == "newsletter":
+            entry.update({"weekly_updates": True, "product_updates": i % 2 == 0, "career_tips": True,
+                          "status": "active", "subscribed_at": (NOW - timedelta(minutes=i)).isoformat()})
+        else:
+            entry["created_at"] = (NOW - timedelta(minutes=i)).isoformat()
+        entries.append(entry)
+    return entries
+
+
+def analytics_response(buckets=48):
+    rollup = {
+        "total": 12,
+        "confidence_area": {"system_design": 5, "data_structures_algorithms": 4, "other": 3},
+        "text_chars": {"frustration": 1450, "ai_coach_help": 980},
+        "answered": {"additional_features": 7},
+    }
+    return {
+        "success": True,
+        "granularity": "hour",
+        "from": (NOW - timedelta(hours=buckets)).isoformat(),
+        "to": NOW.isoformat(),
+        "summary": summarize(dict(rollup, total=12 * buckets)),
+        "buckets": [
+            dict(bucket=(NOW - timedelta(hours=buckets - i)).isoformat(), **summarize(rollup))
+            for i in range(buckets)
+        ],
+    }
+
+
+PAYLOADS = {
+    "waitlist": ({"message": "Successfully joined the waitlist!", "success": True}, False),
+    "stats": ({
+        "success": True,
+        "database_connected": True,
+        "count_mode": "counters",
+        "collections": {"waitlist_entries": 18234, "feedback_responses": 9120, "newsletter_subscribers": 7311},
+        "total_users": 18234,
+        "latest_entries": {kind: latest(kind) for kind in ("waitlist", "feedback", "newsletter")},
+    }, True),
+    "stats_page": ({"success": True, "entries": latest("feedback", 100), "next_before": "x"}, False),
+    "analytics": (analytics_response(), False),
+}
+
+
+def measure(function, iterations, repeat=5):
+    timer = timeit.Timer(function, timer=time.process_time)
+    return min(timer.repeat(repeat=repeat, number=iterations)) / iterations * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    print(f"compression threshold {COMPRESS_MIN_BYTES} bytes; encoders: {', '.join(ENCODERS)}")
+    print(f"{'payload':<12}{'variant':<14}{'bytes':>10}{'vs legacy':>11}{'cpu':>13}")
+    for name, (payload, pretty) in PAYLOADS.items():
+        legacy = json.dumps(payload, indent=2 if pretty else None).encode("utf-8")
+        compact = dumps(payload)
+        variants = [
+            ("legacy", lambda: json.dumps(payload, indent=2 if pretty else None).encode("utf-8"), legacy),
+            ("compact", lambda: dumps(payload), compact),
+        ]
+        for encoding, encode in ENCODERS.items():
+            variants.append((f"compact+{encoding}", lambda encode=encode: encode(dumps(payload)), encode(compact)))
+
+        for variant, function, body in variants:
+            cpu = measure(function, args.iterations)
+            saving = 1 - len(body) / len(legacy)
+            print(f"{name:<12}{variant:<14}{len(body):>10}{saving:>10.0%}{cpu:>10.1f} us")
+        print()
+
+
+if __name__ == "__main__":
+    main()
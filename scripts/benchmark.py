@@ -0,0 +1,169 @@
+"""Load-test the API endpoints and report throughput and latency percentiles.
+
+    python -m scripts.benchmark [--concurrency 16] [--requests 2000] [--url http://host:port]
+
+Without --url an in-process local server (scripts/local_server.py) is
+started against the in-memory MongoDB stand-in, so the numbers measure the
+handlers' own hot paths. Each worker thread holds one keep-alive
+connection and issues requests back to back.
+"""
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+# Endpoint name -> (method, path, body factory or None)
+SCENARIOS = {
+    "health": ("GET", "/api/health", None),
+    "waitlist": ("POST", "/api/waitlist", lambda i: {"email": f"bench-{uuid.uuid4().hex[:12]}@example.com"}),
+    "waitlist_repeat": ("POST", "/api/waitlist", lambda i: {"email": f"repeat-{i % 50}@example.com"}),
+    "newsletter": ("POST", "/api/newsletter", lambda i: {
+        "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        "preferences": {"weekly_updates": True, "product_updates": i % 2 == 0, "career_tips": i % 3 == 0}
+    }),
+    "feedback": ("POST", "/api/feedback", lambda i: {
+        "email": f"bench-{i % 500}@example.com",
+        "frustration": "Not hearing back after interviews",
+        "ai_coach_help": "Mock interviews with feedback",
+        "confidence_area": "System design",
+        "additional_features": ""
+    }),
+    "stats": ("GET", "/api/stats", None),
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(host, port, scenario, total_requests, concurrency):
+    """Drive one endpoint and return a summary dict"""
+    method, path, body_factory = SCENARIOS[scenario]
+    latencies = []
+    errors = [0]
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def worker():
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        local = []
+        local_statuses = {}
+        local_errors = 0
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            body = json.dumps(body_factory(i)).encode("utf-8") if body_factory else None
+            headers = {"Content-Type": "application/json"} if body else {}
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+                if response.status >= 500:
+                    local_errors += 1
+                if response.getheader("Connection", "").lower() == "close":
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+            local.append(time.perf_counter() - start)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "statuses": statuses,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def format_table(results):
+    lines = [f"{'scenario':<16}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for result in results:
+        lines.append(
+            f"{result['scenario']:<16}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", help="benchmark a running server instead of starting one in process")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the in-process handlers' output")
+    args = parser.parse_args(argv)
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    # The handlers log every request; keep that out of the report. LOG_LEVEL
+    # is read when api._logging is first imported, inside build_server().
+    if not args.verbose:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Every benchmark request comes from one address; measure the handlers, not the limiter
+    if not args.url:
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+    server = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        from scripts.local_server import build_server
+
+        server = build_server(port=0, memory=True, quiet=True)
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        results = [run_scenario(host, port, name, args.requests, args.concurrency) for name in scenarios]
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Remove duplicate signups so the unique email indexes can be built.
+
+    python -m scripts.dedupe [--dry-run] [--collection NAME] [--batch-size 200]
+                            [--pause-ms 200] [--checkpoint PATH] [--restart]
+
+Signups written before the unique email indexes existed could race and
+leave several documents for one address. Duplicates are found with a
+server-side $group on email; for each address the earliest document is
+kept and the rest are deleted with batched bulk_write calls. Newsletter
+duplicates first fold their preferences into the kept subscriber.
+
+Addresses are processed in email order and the last one finished is
+checkpointed after every batch, so an interrupted run resumes where it
+stopped. Batches are spaced by --pause-ms, and by at least as long as the
+previous batch took, so the tool stays off the request path's back.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DeleteMany, UpdateOne
+from api._codec import dumps, loads
+from api._counters import reconcile_counters
+from api._db import get_database
+from api._indexes import ensure_indexes
+from api._logging import get_logger
+from api._preferences import NEWSLETTER_COLLECTION, PREFERENCE_BITS, preference_mask
+
+log = get_logger("dedupe")
+
+# Collections keyed on email, and the field that says which document came first
+TARGETS = {
+    "waitlist_entries": "created_at",
+    NEWSLETTER_COLLECTION: "subscribed_at",
+}
+
+# Subscriber fields merged from every duplicate, the most recent stated value winning
+MERGED_FIELDS = tuple(PREFERENCE_BITS) + ("status",)
+
+CHECKPOINT_PATH = os.getenv("DEDUPE_CHECKPOINT", os.path.join(tempfile.gettempdir(), "thetruthschool-dedupe.json"))
+
+
+def duplicate_groups(collection, time_field, after="", batch_size=200):
+    """Emails with more than one document, in email order, after ``after``.
+
+    This scans the collection, since the unique email index the tool makes
+    room for cannot exist yet. Only the _id and signup time of each
+    document travel in the group, which may spill to disk.
+    """
+    return collection.aggregate([
+        {"$match": {"email": {"$gt": after}}},
+        {"$group": {
+            "_id": "$email",
+            "count": {"$sum": 1},
+            "documents": {"$push": {"_id": "$_id", "at": f"${time_field}"}}
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"_id": ASCENDING}},
+    ], allowDiskUse=True, batchSize=batch_size)
+
+
+def signup_order(document):
+    """Sort key putting the earliest signup first; ObjectIds stand in for a missing time"""
+    at = document.get("at")
+    if not isinstance(at, datetime):
+        _id = document["_id"]
+        at = _id.generation_time.replace(tzinfo=None) if isinstance(_id, ObjectId) else datetime.max
+    return at, str(document["_id"])
+
+
+def merge_subscription(documents):
+    """Preferences and status for the kept subscriber, from duplicates ordered oldest first.
+
+    Each field takes the most recent value any duplicate states, so a
+    later opt-out is not undone by an earlier opt-in.
+    """
+    merged = {}
+    for document in documents:
+        for field in MERGED_FIELDS:
+            if field in document:
+                merged[field] = document[field]
+    merged["preference_mask"] = preference_mask({name: merged.get(name, True) for name in PREFERENCE_BITS})
+    return merged
+
+
+def plan_batch(collection, groups):
+    """bulk_write operations for a batch of duplicate groups, and how many documents they remove"""
+    operations = []
+    removed = []
+    keepers = {}
+    for group in groups:
+        documents = sorted(group["documents"], key=signup_order)
+        keepers[documents[0]["_id"]] = [document["_id"] for document in documents]
+        removed.extend(document["_id"] for document in documents[1:])
+
+    if collection.name == NEWSLETTER_COLLECTION:
+        projection = {field: 1 for field in MERGED_FIELDS + ("preference_mask",)}
+        full = {
+            document["_id"]: document
+            for document in collection.find({"_id": {"$in": [i for ids in keepers.values() for i in ids]}}, projection)
+        }
+        for keeper, ids in keepers.items():
+            if keeper not in full:
+                continue
+            merged = merge_subscription([full[i] for i in ids if i in full])
+            changes = {field: value for field, value in merged.items() if full[keeper].get(field) != value}
+            if changes:
+                operations.append(UpdateOne({"_id": keeper}, {"$set": changes}))
+
+    if removed:
+        operations.append(DeleteMany({"_id": {"$in": removed}}))
+    return operations, len(removed)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(path, checkpoint):
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(dumps(checkpoint))
+    os.replace(temporary, path)
+
+
+def dedupe_collection(db, name, dry_run=False, batch_size=200, pause=0.2, checkpoint=None, checkpoint_path=CHECKPOINT_PATH):
+    """Collapse one collection's duplicates. Returns {"emails", "removed", "updated"} totals."""
+    collection = db[name]
+    checkpoint = {} if checkpoint is None else checkpoint
+    totals = {"emails": 0, "removed": 0, "updated": 0}
+
+    def flush(batch):
+        started = time.monotonic()
+        operations, removed = plan_batch(collection, batch)
+        totals["emails"] += len(batch)
+        totals["removed"] += removed
+        totals["updated"] += sum(1 for operation in operations if isinstance(operation, UpdateOne))
+        if dry_run:
+            return
+        if operations:
+            # Ordered, so a subscriber's merged preferences land before its duplicates go
+            collection.bulk_write(operations, ordered=True)
+        checkpoint[name] = batch[-1]["_id"]
+        save_checkpoint(checkpoint_path, checkpoint)
+        log.info("dedupe_batch", collection=name, emails=len(batch), removed=removed, through=batch[-1]["_id"])
+        # Never busier than half the time, however slow the server is
+        time.sleep(max(pause, time.monotonic() - started))
+
+    batch = []
+    for group in duplicate_groups(collection, TARGETS[name], checkpoint.get(name, ""), batch_size):
+        batch.append(group)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--collection", choices=sorted(TARGETS), action="append",
+                        help="limit to one collection (repeatable); defaults to all")
+    parser.add_argument("--batch-size", type=int, default=200, help="duplicate emails per bulk_write")
+    parser.add_argument("--pause-ms", type=int, default=200, help="minimum pause between batches")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="progress file for resuming")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    # The unique indexes are built at the end, once the duplicates are gone
+    os.environ["MONGODB_SKIP_INDEX_BOOTSTRAP"] = "1"
+    database = get_database()
+    if database is None:
+        raise SystemExit("Database connection failed")
+
+    checkpoint = {} if args.restart else load_checkpoint(args.checkpoint)
+    collections = args.collection or list(TARGETS)
+    for name in collections:
+        if checkpoint.get(name):
+            print(f"{name}: resuming after {checkpoint[name]}")
+        totals = dedupe_collection(
+            database, name, dry_run=args.dry_run, batch_size=max(1, args.batch_size),
+            pause=args.pause_ms / 1000.0, checkpoint=checkpoint, checkpoint_path=args.checkpoint
+        )
+        if not args.dry_run:
+            # Finished: a later run starts this collection from the top again
+            checkpoint.pop(name, None)
+            save_checkpoint(args.checkpoint, checkpoint)
+        verb = "would remove" if args.dry_run else "removed"
+        print(f"{name}: {totals['emails']} duplicated emails, {verb} {totals['removed']} documents, "
+              f"{'would merge' if args.dry_run else 'merged'} {totals['updated']} subscribers")
+
+    if args.dry_run:
+        return
+
+    print(f"Reconciled counters: {reconcile_counters(database)}")
+    failures = ensure_indexes(database, collections)
+    if failures:
+        raise SystemExit(f"Failed to create indexes: {', '.join(failures)}")
+    print(f"Indexes are in place on {', '.join(collections)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Run every api/*.py handler in one threaded HTTP/1.1 server.
+
+    python -m scripts.local_server [--port 8000] [--memory]
+
+Each module in api/ that does not start with an underscore is mounted at
+/api/<module>. Connections are kept alive across requests, and responses
+from handlers that do not set Content-Length are buffered so that the
+length can be added, much as the Vercel runtime buffers them.
+With --memory (the default when MONGODB_URI is unset) the handlers run
+against the in-memory stand-in from scripts/memory_mongo.py.
+"""
+import argparse
+import importlib
+import io
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, "api")
+
+
+class _BufferedResponse:
+    """wfile wrapper that sends each response in a single write.
+
+    The header block is held until it is complete. Chunked responses then
+    stream straight through; everything else is buffered until finish(),
+    which adds Content-Length if the handler did not set it.
+    """
+
+    def __init__(self, wfile, head_only):
+        self._wfile = wfile
+        self._head_only = head_only
+        self._head = io.BytesIO()
+        self._body = io.BytesIO()
+        self._passthrough = False
+        self._headers_done = False
+        self._needs_length = False
+
+    def write(self, data):
+        if self._passthrough:
+            return self._wfile.write(data)
+        if self._headers_done:
+            return self._body.write(data)
+
+        self._head.write(data)
+        head = self._head.getvalue()
+        end = head.find(b"\r\n\r\n")
+        if end < 0:
+            return len(data)
+
+        self._headers_done = True
+        header_block, rest = head[:end + 2], head[end + 4:]
+        lowered = header_block.lower()
+        if b"\r\ntransfer-encoding:" in lowered:
+            self._passthrough = True
+            self._wfile.write(header_block + b"\r\n" + rest)
+            return len(data)
+
+        status = header_block.split(b" ", 2)[1] if b" " in header_block else b""
+        self._needs_length = (b"\r\ncontent-length:" not in lowered
+                              and status not in (b"204", b"304") and not status.startswith(b"1"))
+        self._head = io.BytesIO(header_block)
+        self._body.write(rest)
+        return len(data)
+
+    def flush(self):
+        if self._passthrough:
+            self._wfile.flush()
+
+    def finish(self):
+        if self._passthrough or not self._headers_done:
+            self._wfile.flush()
+            return
+        body = b"" if self._head_only else self._body.getvalue()
+        head = self._head.getvalue()
+        if self._needs_length:
+            head += f"Content-Length: {len(self._body.getvalue())}\r\n".encode("ascii")
+        self._wfile.write(head + b"\r\n" + body)
+        self._wfile.flush()
+
+
+class RouterMixin:
+    """Dispatches each request on a kept-alive connection to its api/ handler class"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes = {}
+
+    def handle_one_request(self):
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+            if len(self.raw_requestline) > 65536:
+                self.requestline = ""
+                self.request_version = ""
+                self.command = ""
+                self.send_error(414)
+                return
+            if not self.raw_requestline:
+                self.close_connection = True
+                return
+            if not self.parse_request():
+                return
+
+            route = self.routes.get(urlparse(self.path).path.rstrip("/"))
+            if route is None:
+                self.send_error(404, "No handler mounted at this path")
+                return
+
+            method = "do_" + self.command
+            if not hasattr(route, method):
+                self.send_error(501, f"Unsupported method ({self.command!r})")
+                return
+
+            # Become the matching handler class for the rest of this request
+            self.__class__ = route
+            wfile = self.wfile
+            self.wfile = _BufferedResponse(wfile, head_only=self.command == "HEAD")
+            try:
+                getattr(self, method)()
+                self.wfile.finish()
+            finally:
+                self.wfile = wfile
+        except TimeoutError as e:
+            self.log_error("Request timed out: %r", e)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class RouterHandler(RouterMixin, BaseHTTPRequestHandler):
+    pass
+
+
+def discover_handlers():
+    """Import every public module in api/ and return {path: handler class}"""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    routes = {}
+    for filename in sorted(os.listdir(API_DIR)):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        name = filename[:-3]
+        module = importlib.import_module(f"api.{name}")
+        handler = getattr(module, "handler", None)
+        if handler is None:
+            continue
+        routes[f"/api/{name}"] = type(f"Routed_{name}", (RouterMixin, handler), {})
+    return routes
+
+
+def build_server(host="127.0.0.1", port=8000, memory=None, quiet=False):
+    """Create (but do not start) the local server.
+
+    ``memory`` defaults to True when MONGODB_URI is unset. The in-memory
+    client must be installed before the handler modules are imported,
+    because importing them starts the connection warm-up.
+    """
+    if memory is None:
+        memory = not os.getenv("MONGODB_URI")
+    if memory:
+        from api._db import use_client
+        from scripts.memory_mongo import MemoryClient
+
+        use_client(MemoryClient())
+
+    RouterMixin.routes = discover_handlers()
+    server = ThreadingHTTPServer((host, port), RouterHandler)
+    server.daemon_threads = True
+    server.quiet = quiet
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--memory", action="store_true", default=None,
+                        help="use the in-memory MongoDB stand-in (default when MONGODB_URI is unset)")
+    parser.add_argument("--mongodb", dest="memory", action="store_false",
+                        help="connect to MONGODB_URI even if --memory would be the default")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    args = parser.parse_args(argv)
+
+    server = build_server(args.host, args.port, args.memory, args.quiet)
+    print(f"Serving {', '.join(sorted(RouterMixin.routes))} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
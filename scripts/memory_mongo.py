@@ -0,0 +1,543 @@
+"""In-memory stand-in for the subset of pymongo the API handlers use.
+
+Good enough to run the handlers locally and benchmark their hot paths
+without a MongoDB deployment. It is not a general-purpose mock: only the
+query operators, update operators and collection methods the handlers
+actually call are implemented.
+"""
+import copy
+import threading
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertManyResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+_MISSING = object()
+
+
+def _get_path(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_path(doc, path, value):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _compare(value, operator, operand):
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if operator == "$in":
+        return value in operand
+    if operator == "$nin":
+        return value not in operand
+    if operator == "$ne":
+        return (None if value is _MISSING else value) != operand
+    if operator == "$eq":
+        return value == operand
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if operator == "$lt":
+            return value < operand
+        if operator == "$lte":
+            return value <= operand
+        if operator == "$gt":
+            return value > operand
+        if operator == "$gte":
+            return value >= operand
+    except TypeError:
+        return False
+    if operator == "$bitsAllSet":
+        return isinstance(value, int) and value & operand == operand
+    raise OperationFailure(f"Unsupported query operator {operator}")
+
+
+def matches(doc, query):
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            value = _get_path(doc, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        else:
+            value = _get_path(doc, key)
+            if value is _MISSING:
+                if condition is not None:
+                    return False
+            elif value != condition:
+                return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        result = {}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        for field in include:
+            value = _get_path(doc, field)
+            if value is not _MISSING:
+                _set_path(result, field, copy.deepcopy(value))
+        return result
+
+    result = copy.deepcopy(doc)
+    for field, flag in projection.items():
+        if not flag:
+            result.pop(field, None)
+    return result
+
+
+def _sort_key(value):
+    # Missing and null sort before every other value, as in MongoDB
+    if value is _MISSING or value is None:
+        return (0, 0)
+    return (1, value)
+
+
+def _evaluate(doc, expression):
+    """A "$field" path, a document of expressions, or a literal"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(doc, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, dict):
+        return {key: _evaluate(doc, value) for key, value in expression.items()}
+    return expression
+
+
+def _group(docs, spec):
+    """$group with the $sum, $min, $max, $first and $push accumulators"""
+    groups = {}
+    for doc in docs:
+        key = _evaluate(doc, spec["_id"])
+        hashable = repr(key)
+        if hashable not in groups:
+            groups[hashable] = {"_id": key}
+        group = groups[hashable]
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (operator, expression), = accumulator.items()
+            value = _evaluate(doc, expression)
+            if operator == "$sum":
+                group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+            elif operator == "$push":
+                group.setdefault(field, []).append(value)
+            elif operator == "$first":
+                group.setdefault(field, value)
+            elif operator in ("$min", "$max"):
+                if value is not None:
+                    current = group.get(field)
+                    pick = min if operator == "$min" else max
+                    group[field] = value if current is None else pick(current, value)
+            else:
+                raise OperationFailure(f"Unsupported accumulator {operator}")
+    return list(groups.values())
+
+
+class MemoryCursor:
+    def __init__(self, docs, projection=None):
+        self._docs = docs
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+        self._iterator = None
+
+    def sort(self, key_or_list, direction=1):
+        if isinstance(key_or_list, str):
+            key_or_list = [(key_or_list, direction)]
+        self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def close(self):
+        pass
+
+    def _results(self):
+        docs = list(self._docs)
+        for field, direction in reversed(self._sort or []):
+            docs.sort(key=lambda doc: _sort_key(_get_path(doc, field)), reverse=direction < 0)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self._projection) for doc in docs]
+
+    # Like pymongo's, the cursor is its own single-use iterator, evaluated on first use
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = iter(self._results())
+        return next(self._iterator)
+
+
+class MemoryCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self._docs = {}
+        self._indexes = {"_id_": {"keys": [("_id", 1)], "unique": True}}
+        self._lock = threading.RLock()
+
+    # Indexes
+
+    def create_index(self, keys, name=None, unique=False, **kwargs):
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        with self._lock:
+            spec = dict(kwargs, keys=list(keys), unique=unique)
+            if unique:
+                # Unique indexes are backed by a hash map so inserts stay O(1)
+                entries = {}
+                for doc in self._docs.values():
+                    if not self._covers(spec, doc):
+                        continue
+                    key = self._index_key(doc, spec["keys"])
+                    if key in entries:
+                        raise DuplicateKeyError(
+                            f"E11000 duplicate key error collection: {self.name} index: {name}", 11000
+                        )
+                    entries[key] = doc["_id"]
+                spec["entries"] = entries
+            self._indexes[name] = spec
+        return name
+
+    def index_information(self):
+        with self._lock:
+            return {name: {"key": spec["keys"], "unique": spec["unique"]} for name, spec in self._indexes.items()}
+
+    def drop_index(self, name):
+        with self._lock:
+            self._indexes.pop(name, None)
+
+    def _covers(self, spec, doc):
+        partial = spec.get("partialFilterExpression")
+        return not partial or matches(doc, partial)
+
+    def _index_key(self, doc, keys):
+        return tuple(repr(_get_path(doc, field)) for field, _ in keys)
+
+    def _unique_indexes(self):
+        return [(name, spec) for name, spec in self._indexes.items() if spec["unique"] and name != "_id_"]
+
+    def _check_unique(self, doc):
+        for name, spec in self._unique_indexes():
+            if not self._covers(spec, doc):
+                continue
+            owner = spec["entries"].get(self._index_key(doc, spec["keys"]))
+            if owner is not None and owner != doc["_id"]:
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.name} index: {name}", 11000
+                )
+
+    def _index_add(self, doc):
+        for _, spec in self._unique_indexes():
+            if self._covers(spec, doc):
+                spec["entries"][self._index_key(doc, spec["keys"])] = doc["_id"]
+
+    def _index_remove(self, doc):
+        for _, spec in self._unique_indexes():
+            if self._covers(spec, doc):
+                spec["entries"].pop(self._index_key(doc, spec["keys"]), None)
+
+    def _candidates(self, filter):
+        """Documents that may match, using _id or a unique index for plain equality filters"""
+        if filter and all(not key.startswith("$") and not isinstance(value, dict) for key, value in filter.items()):
+            if "_id" in filter:
+                doc = self._docs.get(filter["_id"])
+                return [doc] if doc is not None else []
+            for _, spec in self._unique_indexes():
+                if spec.get("partialFilterExpression") is None and {field for field, _ in spec["keys"]} == set(filter):
+                    doc_id = spec["entries"].get(self._index_key(filter, spec["keys"]))
+                    return [self._docs[doc_id]] if doc_id is not None else []
+        return list(self._docs.values())
+
+    # Reads
+
+    def find(self, filter=None, projection=None, sort=None, limit=0, skip=0, batch_size=0, **kwargs):
+        with self._lock:
+            docs = [doc for doc in self._candidates(filter) if matches(doc, filter)]
+        cursor = MemoryCursor(docs, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def aggregate(self, pipeline, **kwargs):
+        """$match, $group, $sort, $limit and $project stages, run over a snapshot"""
+        with self._lock:
+            docs = [copy.deepcopy(doc) for doc in self._docs.values()]
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == "$match":
+                docs = [doc for doc in docs if matches(doc, spec)]
+            elif name == "$group":
+                docs = _group(docs, spec)
+            elif name == "$sort":
+                docs = list(MemoryCursor(docs).sort(list(spec.items())))
+            elif name == "$limit":
+                docs = docs[:spec]
+            elif name == "$project":
+                docs = [_project(doc, spec) for doc in docs]
+            else:
+                raise OperationFailure(f"Unsupported pipeline stage {name}")
+        return MemoryCursor(docs)
+
+    def find_one(self, filter=None, projection=None, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        for doc in self.find(filter, projection, limit=1, **kwargs):
+            return doc
+        return None
+
+    def count_documents(self, filter, **kwargs):
+        with self._lock:
+            return sum(1 for doc in self._candidates(filter) if matches(doc, filter))
+
+    def estimated_document_count(self, **kwargs):
+        with self._lock:
+            return len(self._docs)
+
+    # Writes
+
+    def _insert(self, document):
+        doc = copy.deepcopy(document)
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_", 11000)
+        self._check_unique(doc)
+        self._docs[doc["_id"]] = doc
+        self._index_add(doc)
+        document.setdefault("_id", doc["_id"])
+        return doc["_id"]
+
+    def insert_one(self, document, **kwargs):
+        with self._lock:
+            return InsertOneResult(self._insert(document), True)
+
+    def insert_many(self, documents, ordered=True, **kwargs):
+        inserted_ids = []
+        errors = []
+        with self._lock:
+            for index, document in enumerate(documents):
+                try:
+                    inserted_ids.append(self._insert(document))
+                except DuplicateKeyError as e:
+                    errors.append({"index": index, "code": 11000, "errmsg": str(e), "op": document})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted_ids),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []
+            })
+        return InsertManyResult(inserted_ids, True)
+
+    def _apply_update(self, doc, update, inserting):
+        for operator, fields in update.items():
+            if operator == "$setOnInsert" and not inserting:
+                continue
+            for path, value in fields.items():
+                if operator in ("$set", "$setOnInsert"):
+                    _set_path(doc, path, copy.deepcopy(value))
+                elif operator == "$inc":
+                    current = _get_path(doc, path)
+                    _set_path(doc, path, (0 if current is _MISSING else current) + value)
+                elif operator == "$max":
+                    current = _get_path(doc, path)
+                    if current is _MISSING or value > current:
+                        _set_path(doc, path, value)
+                elif operator == "$min":
+                    current = _get_path(doc, path)
+                    if current is _MISSING or value < current:
+                        _set_path(doc, path, value)
+                elif operator == "$unset":
+                    parts = path.split(".")
+                    parent = _get_path(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+                    if isinstance(parent, dict):
+                        parent.pop(parts[-1], None)
+                else:
+                    raise OperationFailure(f"Unsupported update operator {operator}")
+
+    def _update(self, filter, update, upsert, multi):
+        """Returns (matched, modified, upserted_id)"""
+        targets = [doc for doc in self._candidates(filter) if matches(doc, filter)]
+        if not multi:
+            targets = targets[:1]
+
+        modified = 0
+        for doc in targets:
+            candidate = copy.deepcopy(doc)
+            self._apply_update(candidate, update, inserting=False)
+            if candidate != doc:
+                self._check_unique(candidate)
+                self._index_remove(doc)
+                self._docs[doc["_id"]] = candidate
+                self._index_add(candidate)
+                modified += 1
+        if targets or not upsert:
+            return len(targets), modified, None
+
+        doc = {
+            key: value for key, value in filter.items()
+            if not key.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value))
+        }
+        self._apply_update(doc, update, inserting=True)
+        return 0, 0, self._insert(doc)
+
+    def _update_result(self, matched, modified, upserted_id):
+        raw = {"n": matched + (1 if upserted_id is not None else 0), "nModified": modified, "ok": 1.0}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    def update_one(self, filter, update, upsert=False, **kwargs):
+        with self._lock:
+            return self._update_result(*self._update(filter, update, upsert, multi=False))
+
+    def update_many(self, filter, update, upsert=False, **kwargs):
+        with self._lock:
+            return self._update_result(*self._update(filter, update, upsert, multi=True))
+
+    def _delete(self, filter, multi):
+        targets = [doc["_id"] for doc in self._candidates(filter) if matches(doc, filter)]
+        if not multi:
+            targets = targets[:1]
+        for doc_id in targets:
+            self._index_remove(self._docs.pop(doc_id))
+        return len(targets)
+
+    def delete_one(self, filter, **kwargs):
+        with self._lock:
+            return DeleteResult({"n": self._delete(filter, multi=False), "ok": 1.0}, True)
+
+    def delete_many(self, filter, **kwargs):
+        with self._lock:
+            return DeleteResult({"n": self._delete(filter, multi=True), "ok": 1.0}, True)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        result = {
+            "writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+            "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []
+        }
+        with self._lock:
+            for index, request in enumerate(requests):
+                kind = type(request).__name__
+                try:
+                    if kind == "InsertOne":
+                        self._insert(request._doc)
+                        result["nInserted"] += 1
+                    elif kind in ("UpdateOne", "UpdateMany"):
+                        matched, modified, upserted_id = self._update(
+                            request._filter, request._doc, request._upsert, multi=kind == "UpdateMany"
+                        )
+                        result["nMatched"] += matched
+                        result["nModified"] += modified
+                        if upserted_id is not None:
+                            result["nUpserted"] += 1
+                            result["upserted"].append({"index": index, "_id": upserted_id})
+                    elif kind in ("DeleteOne", "DeleteMany"):
+                        result["nRemoved"] += self._delete(request._filter, multi=kind == "DeleteMany")
+                    else:
+                        raise OperationFailure(f"Unsupported bulk operation {kind}")
+                except DuplicateKeyError as e:
+                    result["writeErrors"].append({"index": index, "code": 11000, "errmsg": str(e)})
+                    if ordered:
+                        break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+
+class MemoryDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collections[name] = MemoryCollection(self, name)
+            return collection
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name, **kwargs):
+        return self[name]
+
+    def list_collection_names(self, **kwargs):
+        with self._lock:
+            return list(self._collections)
+
+    def command(self, command, *args, **kwargs):
+        name = command if isinstance(command, str) else next(iter(command))
+        if name in ("ping", "hello", "isMaster"):
+            return {"ok": 1.0}
+        raise OperationFailure(f"Unsupported command {name}")
+
+
+class MemoryClient:
+    """Drop-in for pymongo.MongoClient backed by process memory"""
+
+    def __init__(self, *args, **kwargs):
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            database = self._databases.get(name)
+            if database is None:
+                database = self._databases[name] = MemoryDatabase(self, name)
+            return database
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_database(self, name, **kwargs):
+        return self[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,63 @@
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Settings are read at import, so they are fixed before any api module loads
+os.environ.pop("MONGODB_URI", None)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+os.environ["SPOOL_PATH"] = os.path.join(tempfile.mkdtemp(prefix="thetruthschool-tests-"), "spool.ndjson")
+
+from api._cache import invalidate  # noqa: E402
+from api._db import get_database, use_client  # noqa: E402
+from scripts.memory_mongo import MemoryClient  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database installed as the handlers' connection"""
+    use_client(MemoryClient())
+    invalidate("stats")
+    return get_database()
+
+
+@pytest.fixture(scope="session")
+def server():
+    from scripts.local_server import build_server
+
+    server = build_server(port=0, memory=True, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def call(server, db):
+    """call(method, path, body=None, headers=None) -> (status, headers, decoded JSON or bytes)"""
+    host, port = server.server_address[:2]
+
+    def request(method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            data = response.read()
+        finally:
+            connection.close()
+        if response.getheader("Content-type", "").startswith("application/json"):
+            data = json.loads(data)
+        return response.status, dict(response.getheaders()), data
+
+    return request
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+
+from api.analytics import parse_range
+
+
+def test_aware_datetimes_become_naive_utc():
+    granularity, start, end = parse_range({
+        "granularity": ["hour"],
+        "from": ["2026-10-01T00:00:00Z"],
+        "to": ["2026-10-01T06:00:00+02:00"],
+    })
+
+    assert granularity == "hour"
+    assert start == datetime(2026, 10, 1, 0, 0)
+    assert end == datetime(2026, 10, 1, 4, 0)
+
+
+def test_aware_end_with_default_start():
+    _, start, end = parse_range({"granularity": ["day"], "to": ["2026-10-31T00:00:00Z"]})
+
+    assert (start, end) == (datetime(2026, 10, 1), datetime(2026, 10, 31))
+
+
+def test_mixed_naive_and_aware_bounds_are_compared_in_utc():
+    with pytest.raises(ValueError, match="from must be before to"):
+        parse_range({"from": ["2026-10-01T03:00:00"], "to": ["2026-10-01T04:00:00+02:00"]})
+
+
+def test_range_is_widened_to_whole_buckets():
+    _, start, end = parse_range({"from": ["2026-10-01T00:30:00"], "to": ["2026-10-01T02:30:00"]})
+    assert (start, end) == (datetime(2026, 10, 1, 0), datetime(2026, 10, 1, 3))
+
+    _, start, end = parse_range({"from": ["2026-10-01T01:00:00"], "to": ["2026-10-01T03:00:00"]})
+    assert (start, end) == (datetime(2026, 10, 1, 1), datetime(2026, 10, 1, 3))
+
+
+def test_buckets_overlapping_the_range_are_returned(db, call, monkeypatch):
+    from api import analytics
+    from api._rollups import record_feedback
+
+    monkeypatch.setattr(analytics, "ANALYTICS_TOKEN", "analytics-secret")
+    record_feedback(db, [
+        {"confidence_area": "System Design", "created_at": datetime(2026, 10, 1, hour, 45)}
+        for hour in (0, 1, 2, 3)
+    ])
+
+    status, _, body = call("GET", "/api/analytics?from=2026-10-01T00:30:00&to=2026-10-01T02:30:00",
+                           headers={"Authorization": "Bearer analytics-secret"})
+    assert status == 200
+    assert (body["from"], body["to"]) == ("2026-10-01T00:00:00", "2026-10-01T03:00:00")
+    assert [bucket["bucket"] for bucket in body["buckets"]] == [
+        "2026-10-01T00:00:00", "2026-10-01T01:00:00", "2026-10-01T02:00:00"
+    ]
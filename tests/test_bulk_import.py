@@ -0,0 +1,48 @@
+from api import bulk_import
+from api.bulk_import import new_fields, plan_import
+
+TOKEN = "import-secret"
+
+
+def test_newsletter_rows_follow_the_newsletter_preference_rules():
+    rows = [
+        {"email": "zero@example.com", "preferences": {"weekly_updates": 0}},
+        {"email": "no@example.com", "preferences": {"career_tips": "no"}},
+        {"email": "list@example.com", "preferences": ["weekly_updates"]},
+        {"email": "off@example.com", "preferences": {"product_updates": False}},
+        "plain@example.com",
+    ]
+
+    results, operations, op_rows = plan_import(rows, "newsletter", "import")
+
+    assert [result["status"] for result in results[:3]] == ["invalid"] * 3
+    assert results[0]["error"] == "preferences.weekly_updates must be true or false"
+    assert op_rows == [3, 4]
+
+
+def test_missing_preferences_default_to_opted_in():
+    fields = new_fields("newsletter", {"email": "a@example.com", "preferences": {"product_updates": False}}, "import", None)
+    assert (fields["weekly_updates"], fields["product_updates"], fields["career_tips"]) == (True, False, True)
+
+    fields = new_fields("newsletter", "a@example.com", "import", None)
+    assert (fields["weekly_updates"], fields["product_updates"], fields["career_tips"]) == (True, True, True)
+
+
+def test_import_is_disabled_without_a_token(call, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_TOKEN", None)
+
+    status, _, _ = call("POST", "/api/bulk_import?target=waitlist", b'"a@example.com"',
+                        headers={"Authorization": "Bearer "})
+    assert status == 503
+
+
+def test_import_writes_valid_rows(db, call, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_TOKEN", TOKEN)
+    body = b'{"email": "a@example.com", "preferences": {"career_tips": false}}\n{"email": "b@example.com", "preferences": {"career_tips": "no"}}'
+
+    status, _, response = call("POST", "/api/bulk_import?target=newsletter", body,
+                               headers={"Authorization": f"Bearer {TOKEN}"})
+    assert status == 200
+    assert response["summary"] == {"inserted": 1, "duplicate": 0, "invalid": 1, "error": 0}
+    assert db["newsletter_subscribers"].find_one({"email": "a@example.com"})["career_tips"] is False
+    assert db["newsletter_subscribers"].find_one({"email": "b@example.com"}) is None
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from api._counters import COUNTERS_COLLECTION, TOTALS_ID, increment_counters, read_counters
+
+
+def test_increment_does_not_create_totals(db):
+    increment_counters(db, {"waitlist_entries": 1})
+
+    assert read_counters(db) is None
+
+
+def test_stats_counts_documents_written_before_the_totals(db, call):
+    db["waitlist_entries"].insert_many([
+        {"email": f"existing{i}@example.com", "created_at": datetime.utcnow(), "source": "website"}
+        for i in range(50)
+    ])
+
+    status, _, body = call("POST", "/api/waitlist", {"email": "counted@example.com"})
+    assert status == 200
+
+    status, _, body = call("GET", "/api/stats")
+    assert status == 200
+    assert body["collections"]["waitlist_entries"] == 51
+    assert db[COUNTERS_COLLECTION].find_one({"_id": TOTALS_ID})["waitlist_entries"] == 51
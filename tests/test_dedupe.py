@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+from api._db import get_database, use_client
+from scripts import dedupe
+from scripts.memory_mongo import MemoryClient
+
+START = datetime(2026, 1, 1)
+
+
+def test_dedupe_keeps_the_earliest_signup_and_indexes_only_what_it_processed(tmp_path, monkeypatch):
+    monkeypatch.setenv("MONGODB_SKIP_INDEX_BOOTSTRAP", "1")
+    use_client(MemoryClient())
+    db = get_database()
+    db["waitlist_entries"].insert_many([
+        {"email": "twice@example.com", "created_at": START + timedelta(hours=1)},
+        {"email": "twice@example.com", "created_at": START},
+        {"email": "once@example.com", "created_at": START},
+    ])
+
+    dedupe.main(["--collection", "waitlist_entries", "--pause-ms", "0", "--checkpoint", str(tmp_path / "checkpoint.json")])
+
+    kept = list(db["waitlist_entries"].find({"email": "twice@example.com"}))
+    assert [document["created_at"] for document in kept] == [START]
+    assert "email_unique" in db["waitlist_entries"].index_information()
+    assert "email_unique" not in db["newsletter_subscribers"].index_information()
+    assert "email" not in db["feedback_responses"].index_information()
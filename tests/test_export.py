@@ -0,0 +1,111 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+from api import export
+from api._request import RequestError, require_token
+from api._stream import csv_value
+
+TOKEN = "export-secret"
+
+
+class FakeRequest:
+    def __init__(self, authorization=None):
+        self.headers = {} if authorization is None else {"Authorization": authorization}
+
+
+def test_require_token_fails_closed_without_a_token():
+    with pytest.raises(RequestError) as error:
+        require_token(FakeRequest(f"Bearer {TOKEN}"), None)
+    assert error.value.status == 503
+
+
+@pytest.mark.parametrize("authorization", [None, "", "Bearer", "Bearer wrong", f"Basic {TOKEN}", f"Bearer {TOKEN}x"])
+def test_require_token_rejects_other_credentials(authorization):
+    with pytest.raises(RequestError) as error:
+        require_token(FakeRequest(authorization), TOKEN)
+    assert error.value.status == 401
+
+
+def test_require_token_accepts_the_bearer_token():
+    require_token(FakeRequest(f"Bearer {TOKEN}"), TOKEN)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=HYPERLINK(\"http://example.com\")", "'=HYPERLINK(\"http://example.com\")"),
+    ("+1 555 0100", "'+1 555 0100"),
+    ("-2+3", "'-2+3"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("\tcmd", "'\tcmd"),
+    ("someone@example.com", "someone@example.com"),
+    (-3, -3),
+    (True, True),
+    (None, ""),
+])
+def test_csv_value_neutralizes_formulas(value, expected):
+    assert csv_value(value) == expected
+
+
+def test_export_is_disabled_without_a_token(call, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_TOKEN", None)
+
+    status, _, body = call("GET", "/api/export?collection=waitlist", headers={"Authorization": "Bearer "})
+    assert status == 503
+    assert body["success"] is False
+
+
+def test_export_requires_the_token(call, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_TOKEN", TOKEN)
+
+    status, _, _ = call("GET", "/api/export?collection=waitlist", headers={"Authorization": "Bearer wrong"})
+    assert status == 401
+
+
+def test_export_csv_escapes_formula_cells(db, call, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_TOKEN", TOKEN)
+    db["waitlist_entries"].insert_one({"email": "a@example.com", "source": "=cmd|'/c calc'!A1", "created_at": datetime(2026, 1, 1)})
+
+    status, _, body = call("GET", "/api/export?collection=waitlist&format=csv&fields=email,source",
+                           headers={"Authorization": f"Bearer {TOKEN}"})
+    assert status == 200
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    assert rows[0]["email"] == "a@example.com"
+    assert rows[0]["source"] == "'=cmd|'/c calc'!A1"
+
+
+class UnreachableCursor:
+    closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raise ServerSelectionTimeoutError("no servers")
+
+    def close(self):
+        self.closed = True
+
+
+def test_query_failures_before_any_data_get_an_error_response(db, call, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_TOKEN", TOKEN)
+    cursor = UnreachableCursor()
+    monkeypatch.setattr(db["waitlist_entries"], "find", lambda *args, **kwargs: cursor, raising=False)
+
+    status, headers, body = call("GET", "/api/export?collection=waitlist&format=csv",
+                                 headers={"Authorization": f"Bearer {TOKEN}"})
+    assert status == 500
+    assert "Transfer-Encoding" not in headers
+    assert body["success"] is False
+    assert cursor.closed
+
+
+def test_empty_exports_still_send_the_header_row(db, call, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_TOKEN", TOKEN)
+
+    status, _, body = call("GET", "/api/export?collection=waitlist&format=csv&fields=email",
+                           headers={"Authorization": f"Bearer {TOKEN}"})
+    assert status == 200
+    assert body.decode("utf-8").splitlines() == ["_id,email"]
@@ -0,0 +1,47 @@
+import time
+
+from api import _health_probe
+from api._health_probe import STALE_AFTER, DatabaseProbe
+
+
+def probed(db):
+    probe = DatabaseProbe(interval=60, window=4)
+    probe.probe()
+    return probe
+
+
+def test_fresh_reachable_probe_is_ready(db):
+    ready, details = probed(db).report()
+
+    assert ready
+    assert details["status"] == "ready"
+    assert not details["stale"]
+
+
+def test_stale_probe_is_not_ready(db):
+    probe = probed(db)
+    # A probe stuck in its ping leaves the last good result in place
+    probe.state = dict(probe.state, checked=time.monotonic() - STALE_AFTER - 1)
+
+    ready, details = probe.report()
+    assert not ready
+    assert details["stale"]
+    assert details["status"] == "unavailable"
+
+
+def test_probe_runs_under_a_bounded_timeout(db, monkeypatch):
+    timeouts = []
+
+    class RecordingTimeout:
+        def __init__(self, seconds):
+            timeouts.append(seconds)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(_health_probe.pymongo, "timeout", RecordingTimeout)
+    probed(db)
+    assert timeouts == [_health_probe.PROBE_TIMEOUT]
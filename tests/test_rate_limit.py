@@ -0,0 +1,54 @@
+from email.message import Message
+
+import pytest
+
+from api import _rate_limit
+from api._rate_limit import TokenBucketLimiter, client_key
+
+
+class FakeRequest:
+    def __init__(self, headers=None, peer="198.51.100.7"):
+        self.headers = Message()
+        for name, value in (headers or {}).items():
+            self.headers[name] = value
+        self.client_address = (peer, 50000)
+
+
+@pytest.fixture(autouse=True)
+def direct(monkeypatch):
+    monkeypatch.setattr(_rate_limit, "ON_VERCEL", False)
+    monkeypatch.setattr(_rate_limit, "TRUSTED_PROXIES", 0)
+
+
+def test_forwarded_headers_are_ignored_without_a_trusted_proxy():
+    request = FakeRequest({"X-Forwarded-For": "203.0.113.1", "X-Real-IP": "203.0.113.2"})
+
+    assert client_key(request) == "198.51.100.7"
+
+
+def test_trusted_proxies_pick_the_hop_they_appended(monkeypatch):
+    monkeypatch.setattr(_rate_limit, "TRUSTED_PROXIES", 1)
+    assert client_key(FakeRequest({"X-Forwarded-For": "10.9.9.9, 203.0.113.1"})) == "203.0.113.1"
+
+    monkeypatch.setattr(_rate_limit, "TRUSTED_PROXIES", 2)
+    assert client_key(FakeRequest({"X-Forwarded-For": "10.9.9.9, 203.0.113.1, 192.0.2.10"})) == "203.0.113.1"
+    # Fewer hops than proxies: the header was not built by them
+    assert client_key(FakeRequest({"X-Forwarded-For": "203.0.113.1"})) == "198.51.100.7"
+
+
+def test_platform_headers_are_used_on_vercel(monkeypatch):
+    monkeypatch.setattr(_rate_limit, "ON_VERCEL", True)
+    request = FakeRequest({"X-Forwarded-For": "10.9.9.9", "X-Vercel-Forwarded-For": "203.0.113.1"})
+
+    assert client_key(request) == "203.0.113.1"
+
+
+def test_rotating_forged_forwarded_for_shares_one_bucket(monkeypatch):
+    monkeypatch.setattr(_rate_limit, "TRUSTED_PROXIES", 1)
+    limiter = TokenBucketLimiter(10 / 60.0, 5, 100)
+
+    allowed = 0
+    for i in range(20):
+        request = FakeRequest({"X-Forwarded-For": f"192.0.2.{i}, 203.0.113.1"})
+        allowed += not limiter.acquire(client_key(request))
+    assert allowed == 5
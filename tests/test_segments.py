@@ -0,0 +1,37 @@
+import json
+
+from api import segments
+
+TOKEN = "export-secret"
+
+
+def subscribe(db, email, **preferences):
+    from api._preferences import preference_mask
+
+    flags = dict({"weekly_updates": True, "product_updates": True, "career_tips": True}, **preferences)
+    db["newsletter_subscribers"].insert_one(dict(flags, email=email, status="active", preference_mask=preference_mask(flags)))
+
+
+def test_segments_are_disabled_without_a_token(call, monkeypatch):
+    monkeypatch.setattr(segments, "EXPORT_TOKEN", None)
+
+    status, _, _ = call("GET", "/api/segments?career_tips=true")
+    assert status == 503
+
+
+def test_segment_lists_stream_as_csv_and_ndjson(db, call, monkeypatch):
+    monkeypatch.setattr(segments, "EXPORT_TOKEN", TOKEN)
+    subscribe(db, "-tips@example.com")
+    subscribe(db, "quiet@example.com", career_tips=False)
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+
+    status, response_headers, body = call("GET", "/api/segments?career_tips=true&format=csv&batch_size=1", headers=headers)
+    assert status == 200
+    assert response_headers["Transfer-Encoding"] == "chunked"
+    lines = body.decode("utf-8").splitlines()
+    assert lines[0] == "_id,email"
+    assert [line.split(",", 1)[1] for line in lines[1:]] == ["'-tips@example.com"]
+
+    status, _, body = call("GET", "/api/segments?career_tips=false&format=ndjson", headers=headers)
+    assert status == 200
+    assert [json.loads(line)["email"] for line in body.splitlines()] == ["quiet@example.com"]
@@ -0,0 +1,31 @@
+import pytest
+
+from api import _logging
+from api._db import env_float
+
+
+@pytest.mark.parametrize("value, expected", [(None, 10.0), ("", 10.0), ("2.5", 2.5), ("ten", 10.0), ("nan", 10.0), ("inf", 10.0)])
+def test_env_float_falls_back_on_values_that_do_not_parse(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("TEST_SETTING", raising=False)
+    else:
+        monkeypatch.setenv("TEST_SETTING", value)
+
+    assert env_float("TEST_SETTING", 10.0) == expected
+
+
+@pytest.mark.parametrize("value, expected", [("0.25", 0.25), ("0", 0.0), ("abc", 1.0), ("2", 1.0), ("-1", 1.0), ("nan", 1.0)])
+def test_log_sample_rate_falls_back_on_values_that_do_not_parse(monkeypatch, value, expected):
+    monkeypatch.setenv("LOG_SAMPLE_RATE", value)
+    monkeypatch.setattr(_logging, "_invalid_settings", [])
+
+    assert _logging._setting("LOG_SAMPLE_RATE", 1.0, _logging._fraction) == expected
+    assert bool(_logging._invalid_settings) == (value in ("abc", "2", "-1", "nan"))
+
+
+def test_log_level_falls_back_on_unknown_names(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "loud")
+    assert _logging._setting("LOG_LEVEL", "INFO", _logging._level) == "INFO"
+
+    monkeypatch.setenv("LOG_LEVEL", "debug")
+    assert _logging._setting("LOG_LEVEL", "INFO", _logging._level) == "DEBUG"
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime
+
+from pymongo.errors import AutoReconnect
+
+from api import _spool
+from api._breaker import CLOSED, mongo_breaker
+from api._counters import read_counters, reconcile_counters
+from api._db import insert_if_absent
+from api._spool import SIGNUP, _replay_lock, journal, make_entry, replay, write_or_spool
+
+
+def wait_for_replay(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while (journal.has_pending() or _replay_lock.locked()) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def signup(email):
+    # Whole milliseconds, as BSON and the journal store them
+    now = datetime.utcnow()
+    fields = {"created_at": now.replace(microsecond=now.microsecond // 1000 * 1000), "source": "website"}
+    return dict(fields, email=email), lambda collection: insert_if_absent(collection, email, fields)
+
+
+def test_successful_write_replays_entries_journaled_while_the_circuit_was_closed(db):
+    def unreachable(collection):
+        raise AutoReconnect("connection reset")
+
+    document, _ = signup("stranded@example.com")
+    assert write_or_spool("waitlist_entries", SIGNUP, document, unreachable) == (None, True)
+    # One failure does not open the circuit, so no close will trigger replay
+    assert mongo_breaker.state == CLOSED
+    assert journal.has_pending()
+
+    document, write = signup("next@example.com")
+    assert write_or_spool("waitlist_entries", SIGNUP, document, write) == (True, False)
+    wait_for_replay()
+
+    assert not journal.has_pending()
+    assert db["waitlist_entries"].find_one({"email": "stranded@example.com"}) is not None
+
+
+def test_interrupted_replay_counts_every_entry_once_finished(db, monkeypatch):
+    reconcile_counters(db)
+    journal.append(*[make_entry("waitlist_entries", SIGNUP, signup(email)[0])
+                     for email in ("first@example.com", "second@example.com")])
+
+    apply_entry = _spool.apply_entry
+    calls = []
+
+    def drop_after_first(db, entry):
+        calls.append(entry)
+        if len(calls) > 1:
+            raise AutoReconnect("connection reset")
+        return apply_entry(db, entry)
+
+    monkeypatch.setattr(_spool, "apply_entry", drop_after_first)
+    assert replay(wait=True) == 1
+    assert db["waitlist_entries"].count_documents({}) == 1
+
+    monkeypatch.setattr(_spool, "apply_entry", apply_entry)
+    assert replay(wait=True) == 2
+    assert not journal.has_pending()
+    assert db["waitlist_entries"].count_documents({}) == 2
+    assert read_counters(db)["waitlist_entries"] == 2
+
+
+def test_replay_counts_writes_that_reached_the_server_before_failing(db):
+    reconcile_counters(db)
+    db["waitlist_entries"].insert_one({"email": "taken@example.com", "created_at": datetime(2026, 1, 1), "source": "website"})
+
+    def lost_reply(collection):
+        write(collection)
+        raise AutoReconnect("connection reset after the write")
+
+    document, write = signup("landed@example.com")
+    assert write_or_spool("waitlist_entries", SIGNUP, document, lost_reply) == (None, True)
+    duplicate, _ = signup("taken@example.com")
+    journal.append(make_entry("waitlist_entries", SIGNUP, duplicate))
+
+    replay(wait=True)
+
+    assert db["waitlist_entries"].count_documents({}) == 2
+    # The landed signup counts; the address that was already taken does not
+    assert read_counters(db)["waitlist_entries"] == 1
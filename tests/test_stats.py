@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from api import stats
+
+TOKEN = "export-secret"
+
+
+def test_entry_paging_is_disabled_without_a_token(call, monkeypatch):
+    monkeypatch.setattr(stats, "EXPORT_TOKEN", None)
+
+    status, _, body = call("GET", "/api/stats?entries=waitlist")
+    assert status == 503
+    assert "entries" not in body
+
+
+def test_entry_paging_requires_the_token(db, call, monkeypatch):
+    monkeypatch.setattr(stats, "EXPORT_TOKEN", TOKEN)
+    start = datetime(2026, 1, 1)
+    db["waitlist_entries"].insert_many([
+        {"email": f"user{i}@example.com", "created_at": start + timedelta(minutes=i), "source": "website"}
+        for i in range(3)
+    ])
+
+    status, _, _ = call("GET", "/api/stats?entries=waitlist", headers={"Authorization": "Bearer wrong"})
+    assert status == 401
+
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    status, _, page = call("GET", "/api/stats?entries=waitlist&limit=2", headers=headers)
+    assert status == 200
+    assert [entry["email"] for entry in page["entries"]] == ["user2@example.com", "user1@example.com"]
+
+    status, _, page = call("GET", f"/api/stats?entries=waitlist&limit=2&before={page['next_before']}", headers=headers)
+    assert [entry["email"] for entry in page["entries"]] == ["user0@example.com"]
+    assert page["next_before"] is None
+
+
+def test_summary_stays_public(call):
+    status, _, body = call("GET", "/api/stats")
+    assert status == 200
+    assert body["success"] is True
@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+
+import pytest
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from api import submit
+from api._spool import journal, replay
+from scripts.memory_mongo import MemoryClient
+
+FEEDBACK = {"frustration": "Mock interviews", "ai_coach_help": "Practice", "confidence_area": "System design"}
+
+
+class StubSession:
+    """A session whose transaction runs the writes as-is, or fails to start with ``error``"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @contextmanager
+    def start_transaction(self):
+        self.transactions += 1
+        if self.error is not None:
+            raise self.error
+        yield
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """Make the in-memory deployment report transaction support and hand out one StubSession"""
+    session = StubSession()
+    monkeypatch.setattr(submit, "TRANSACTIONS", True)
+    monkeypatch.setattr(submit, "supports_transactions", lambda client: True)
+    monkeypatch.setattr(MemoryClient, "start_session", lambda client: session, raising=False)
+    return session
+
+
+def submit_all(call, email):
+    return call("POST", "/api/submit", {"email": email, "waitlist": True, "newsletter": True, "feedback": FEEDBACK})
+
+
+def test_parts_are_written_in_one_transaction(call, db, session):
+    status, _, body = submit_all(call, "together@example.com")
+
+    assert status == 201
+    assert session.transactions == 1
+    assert {name: result["status"] for name, result in body["results"].items()} == {
+        "waitlist": "created", "newsletter": "created", "feedback": "created"
+    }
+    for collection in submit.COLLECTIONS.values():
+        assert db[collection].count_documents({"email": "together@example.com"}) == 1
+
+
+def test_aborted_transaction_falls_back_to_independent_writes(call, db, session):
+    db["newsletter_subscribers"].insert_one({"email": "raced@example.com", "status": "active"})
+    session.error = OperationFailure("Transaction aborted: WriteConflict", code=112)
+
+    status, _, body = submit_all(call, "raced@example.com")
+
+    assert status == 201
+    assert session.transactions == 1
+    assert body["success"] is True
+    assert body["results"]["waitlist"]["status"] == "created"
+    assert body["results"]["newsletter"] == {
+        "success": True, "status": "duplicate", "message": "Email already subscribed to newsletter!"
+    }
+    assert body["results"]["feedback"]["status"] == "created"
+    assert db["newsletter_subscribers"].count_documents({"email": "raced@example.com"}) == 1
+
+
+def test_unreachable_database_journals_every_part(call, db, session):
+    session.error = AutoReconnect("connection reset")
+
+    status, _, body = submit_all(call, "offline@example.com")
+
+    assert status == 202
+    assert body["success"] is True
+    assert {result["status"] for result in body["results"].values()} == {"queued"}
+    assert journal.has_pending()
+    for collection in submit.COLLECTIONS.values():
+        assert db[collection].count_documents({"email": "offline@example.com"}) == 0
+
+    replay(wait=True)
+    assert not journal.has_pending()
+    for collection in submit.COLLECTIONS.values():
+        assert db[collection].count_documents({"email": "offline@example.com"}) == 1
+
+
+def test_status_reflects_the_most_significant_part(call, db, monkeypatch):
+    monkeypatch.setattr(submit, "TRANSACTIONS", False)
+
+    status, _, body = call("POST", "/api/submit", {"email": "again@example.com", "waitlist": True})
+    assert (status, body["results"]["waitlist"]["status"]) == (201, "created")
+
+    status, _, body = call("POST", "/api/submit", {"email": "again@example.com", "waitlist": True})
+    assert (status, body["results"]["waitlist"]["status"]) == (200, "duplicate")
+
+    def broken(collection, email, fields, session=None):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(submit, "insert_if_absent", broken)
+    status, _, body = call("POST", "/api/submit", {"email": "broken@example.com", "waitlist": True, "feedback": FEEDBACK})
+    assert status == 201
+    assert body["success"] is False
+    assert body["results"]["waitlist"] == {"success": False, "status": "failed", "error": "Server error: disk full"}
+    assert body["results"]["feedback"]["status"] == "created"
+
+    status, _, body = call("POST", "/api/submit", {"email": "broken@example.com", "newsletter": True})
+    assert status == 500
+    assert body["results"]["newsletter"]["status"] == "failed"
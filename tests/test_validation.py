@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from api._codec import _json_dumps, _json_loads
+from api._validation import NEWSLETTER_SCHEMA, ValidationError
+
+
+def test_newsletter_preferences_default_to_opted_in():
+    assert NEWSLETTER_SCHEMA.validate({"email": " A@Example.com "}) == {
+        "email": "a@example.com",
+        "preferences": {"weekly_updates": True, "product_updates": True, "career_tips": True},
+    }
+    cleaned = NEWSLETTER_SCHEMA.validate({"email": "a@example.com", "preferences": None})
+    assert cleaned["preferences"]["career_tips"] is True
+
+
+@pytest.mark.parametrize("preferences, message", [
+    ({"career_tips": 0}, "preferences.career_tips must be true or false"),
+    ({"weekly_updates": "no"}, "preferences.weekly_updates must be true or false"),
+    ({"product_updates": None}, "preferences.product_updates must be true or false"),
+    (["career_tips"], "preferences must be an object"),
+    ("all", "preferences must be an object"),
+])
+def test_newsletter_rejects_invalid_preferences(preferences, message):
+    with pytest.raises(ValidationError) as error:
+        NEWSLETTER_SCHEMA.validate({"email": "a@example.com", "preferences": preferences})
+    assert error.value.message == message
+
+
+def test_stdlib_codec_round_trips():
+    document = {"email": "é@example.com", "ok": True, "n": [1, 2.5, None]}
+
+    assert _json_dumps(document) == b'{"email":"\\u00e9@example.com","ok":true,"n":[1,2.5,null]}'
+    assert _json_loads(_json_dumps(document)) == document
+    assert _json_loads(bytearray(b"[1]")) == [1]
+    with pytest.raises(ValueError):
+        _json_loads(b"\xff")
+
+
+@pytest.mark.parametrize("value", [
+    {"success": True, "count": 3, "ratio": 0.5, "missing": None, "items": [1, "two", {"nested": []}]},
+    {"text": "é\n\"quoted\"\t "},
+    [],
+    "plain",
+])
+def test_stdlib_dumps_matches_json_dumps(value):
+    assert _json_dumps(value) == json.dumps(value, separators=(",", ":")).encode("utf-8")
+    assert _json_dumps(value, pretty=True) == json.dumps(value, indent=2).encode("utf-8")
@@ -0,0 +1,42 @@
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from api._write_behind import WriteBehindQueue
+
+
+class FailingCollection:
+    def __init__(self, error):
+        self.error = error
+
+    def insert_many(self, documents, ordered=True):
+        raise self.error
+
+
+def flush_with(error, documents):
+    flushed, failed = [], []
+    queue = WriteBehindQueue(
+        lambda: FailingCollection(error), batch_size=len(documents) + 1,
+        on_flushed=flushed.extend, on_failed=failed.extend
+    )
+    for document in documents:
+        queue.put(document)
+    queue.flush()
+    return flushed, failed
+
+
+def test_unexpected_errors_hand_the_batch_to_on_failed():
+    documents = [{"n": 1}, {"n": 2}]
+
+    assert flush_with(RuntimeError("encoder blew up"), documents) == ([], documents)
+    assert flush_with(AutoReconnect("connection reset"), documents) == ([], documents)
+
+
+def test_partial_failures_hand_over_only_unwritten_documents():
+    documents = [{"n": 1}, {"n": 2}, {"n": 3}]
+    error = BulkWriteError({
+        "nInserted": 1,
+        "writeErrors": [{"index": 1, "code": 11000}, {"index": 2, "code": 121}],
+    })
+
+    flushed, failed = flush_with(error, documents)
+    assert flushed == [{"n": 1}]
+    assert failed == [{"n": 3}]